@@ -0,0 +1,58 @@
+import argparse
+import logging
+from functools import partial
+from timeit import timeit
+
+import yaml
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+_LOGGER = logging.getLogger("hive-cli.benchmark")
+
+BACKENDS: dict[str, tuple[type, type]] = {"python": (yaml.SafeLoader, yaml.SafeDumper)}
+if yaml.__with_libyaml__:
+    BACKENDS["libyaml"] = (yaml.CSafeLoader, yaml.CSafeDumper)
+
+
+def compose_document(services: int) -> dict:
+    return {
+        "services": {
+            f"service-{i}": {
+                "image": f"ghcr.io/caretech-owl/service-{i}:1.{i}",
+                "ports": [f"{8000 + i}:80"],
+                "volumes": [f"data-{i}:/var/lib/data", "./config:/etc/config:ro"],
+                "environment": {"LOG_LEVEL": "info", "WORKERS": str(i % 8 + 1)},
+                "depends_on": [f"service-{i - 1}"] if i else [],
+                "command": ["serve", "--port", "80"],
+            }
+            for i in range(services)
+        },
+        "volumes": {f"data-{i}": {"driver": "local"} for i in range(services)},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare YAML backends on a large compose file."
+    )
+    parser.add_argument("--services", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    document = compose_document(args.services)
+    text = yaml.dump(document, Dumper=yaml.SafeDumper)
+    _LOGGER.info(
+        "%d services, %d KiB, %d runs", args.services, len(text) // 1024, args.repeat
+    )
+    for name, (loader, dumper) in BACKENDS.items():
+        load = timeit(partial(yaml.load, text, Loader=loader), number=args.repeat)
+        dump = timeit(partial(yaml.dump, document, Dumper=dumper), number=args.repeat)
+        _LOGGER.info(
+            "%-8s load %7.1f ms  dump %7.1f ms",
+            name,
+            load / args.repeat * 1000,
+            dump / args.repeat * 1000,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import docker
+import docker.auth
+import docker.errors
+
+from hive_cli.data import ContainerState, LocalImage, Recipe
+from hive_cli.process import ProcessSupervisor
+
+_LOGGER = logging.getLogger(__name__)
+
+PROJECT_LABEL = "com.docker.compose.project"
+
+
+class Backend(ABC):
+    """Read and pull operations the controller needs from the container engine."""
+
+    @property
+    def resolves_digests(self) -> bool:
+        """Whether `remote_digest` returns digests comparable to `local_digests`."""
+        return True
+
+    @abstractmethod
+    def containers(self, recipe: Recipe) -> list[ContainerState]:
+        """Running containers of the recipe's compose project."""
+
+    @abstractmethod
+    def logs(self, recipe: Recipe, num_entries: int) -> list[str]:
+        """Last log lines of the recipe's containers prefixed with their name."""
+
+    @abstractmethod
+    def pull(
+        self,
+        image: str,
+        environment: dict[str, str],
+        progress: Callable[[dict], None] | None = None,
+    ) -> None:
+        """Pull an image and raise a `RuntimeError` if this fails.
+
+        `progress` receives the engine's JSON progress messages if available.
+        """
+
+    @abstractmethod
+    def local_digests(self, image: str) -> set[str]:
+        """Repo digests of the local image or an empty set if it is missing."""
+
+    @abstractmethod
+    def remote_digest(self, image: str, environment: dict[str, str]) -> str | None:
+        """Digest of the image's manifest in the registry.
+
+        Returns None if the engine cannot resolve it without pulling.
+        """
+
+    @abstractmethod
+    def images(self) -> list[LocalImage]:
+        """All images stored by the engine."""
+
+    @abstractmethod
+    def used_images(self) -> set[str]:
+        """Ids of images referenced by any container, running or not."""
+
+    @abstractmethod
+    def remove_image(self, reference: str) -> None:
+        """Remove an image tag or an untagged image without forcing it."""
+
+
+class SdkBackend(Backend):
+    """Talks to the engine socket through the docker SDK."""
+
+    def __init__(self, client: docker.DockerClient) -> None:
+        self.client = client
+
+    def project_containers(self, project: str) -> dict[str, ContainerState]:
+        states = {}
+        for container in self.client.api.containers(
+            filters={"label": f"{PROJECT_LABEL}={project}"}
+        ):
+            try:
+                attrs = self.client.api.inspect_container(container["Id"])
+            except docker.errors.NotFound:
+                continue
+            states[attrs["Id"]] = ContainerState.from_attrs(attrs)
+        return states
+
+    def containers(self, recipe: Recipe) -> list[ContainerState]:
+        if recipe.project_name is None:
+            return []
+        return sorted(
+            self.project_containers(recipe.project_name).values(),
+            key=lambda state: state.name,
+        )
+
+    def logs(self, recipe: Recipe, num_entries: int) -> list[str]:
+        if recipe.project_name is None:
+            return []
+        entries = []
+        for container in self.client.api.containers(
+            filters={"label": f"{PROJECT_LABEL}={recipe.project_name}"}
+        ):
+            name = container["Names"][0].lstrip("/")
+            raw = self.client.api.logs(
+                container["Id"], tail=num_entries, timestamps=True
+            )
+            for line in raw.decode("utf-8").splitlines():
+                timestamp, _, message = line.partition(" ")
+                entries.append((timestamp, f"{name}  | {message}"))
+        return [line for _, line in sorted(entries)[-num_entries:]]
+
+    def _auth_config(self, image: str, environment: dict[str, str]) -> dict | None:
+        config_dir = environment.get("DOCKER_CONFIG")
+        if config_dir is None:
+            return None
+        registry, _ = docker.auth.resolve_repository_name(image)
+        config = docker.auth.load_config(Path(config_dir) / "config.json")
+        return config.resolve_authconfig(registry)
+
+    def pull(
+        self,
+        image: str,
+        environment: dict[str, str],
+        progress: Callable[[dict], None] | None = None,
+    ) -> None:
+        for event in self.client.api.pull(
+            image,
+            stream=True,
+            decode=True,
+            auth_config=self._auth_config(image, environment),
+        ):
+            if "error" in event:
+                raise RuntimeError(event["error"])
+            if progress is not None:
+                progress(event)
+
+    def local_digests(self, image: str) -> set[str]:
+        try:
+            attrs = self.client.api.inspect_image(image)
+        except docker.errors.ImageNotFound:
+            return set()
+        return {digest.split("@")[-1] for digest in attrs.get("RepoDigests") or []}
+
+    def remote_digest(self, image: str, environment: dict[str, str]) -> str | None:
+        res = self.client.api.inspect_distribution(
+            image, auth_config=self._auth_config(image, environment)
+        )
+        return res["Descriptor"]["digest"]
+
+    def images(self) -> list[LocalImage]:
+        return [
+            LocalImage(
+                id=attrs["Id"],
+                tags=[
+                    tag
+                    for tag in attrs.get("RepoTags") or []
+                    if tag != "<none>:<none>"
+                ],
+                digests=attrs.get("RepoDigests") or [],
+                size=attrs.get("Size", 0),
+                created=attrs.get("Created", 0),
+            )
+            for attrs in self.client.api.images()
+        ]
+
+    def used_images(self) -> set[str]:
+        return {attrs["ImageID"] for attrs in self.client.api.containers(all=True)}
+
+    def remove_image(self, reference: str) -> None:
+        self.client.api.remove_image(reference)
+
+
+class CliBackend(Backend):
+    """Fallback which forks the docker CLI for every operation."""
+
+    def __init__(self, supervisor: ProcessSupervisor, timeout: float) -> None:
+        self.supervisor = supervisor
+        self.timeout = timeout
+        self._buildx: bool | None = None
+
+    @property
+    def resolves_digests(self) -> bool:
+        if self._buildx is None:
+            self._buildx = self.supervisor.run(["docker", "buildx", "version"]).ok
+            if not self._buildx:
+                _LOGGER.info("docker buildx not found, always pulling images")
+        return self._buildx
+
+    def _run(self, cmd: list[str], recipe: Recipe | None = None) -> list[str]:
+        return (
+            self.supervisor.run(
+                cmd,
+                cwd=recipe.path.parent if recipe else None,
+                env=os.environ | recipe.environment if recipe else None,
+            )
+            .check()
+            .output
+        )
+
+    def containers(self, recipe: Recipe) -> list[ContainerState]:
+        plan = recipe.plan()
+        if not plan.valid:
+            _LOGGER.error("No valid composer files found.")
+            return []
+        return [
+            ContainerState.model_validate_json(line)
+            for line in self._run([*plan.command, "ps", "--format", "json"], recipe)
+            if line
+        ]
+
+    def logs(self, recipe: Recipe, num_entries: int) -> list[str]:
+        plan = recipe.plan()
+        if not plan.valid:
+            return []
+        return self._run(
+            [*plan.command, "logs", "--no-color", "-n", str(num_entries)], recipe
+        )
+
+    def pull(
+        self,
+        image: str,
+        environment: dict[str, str],
+        progress: Callable[[dict], None] | None = None,  # noqa: ARG002
+    ) -> None:
+        self.supervisor.run(
+            ["docker", "pull", image],
+            env=os.environ | environment,
+            timeout=self.timeout,
+        ).check()
+
+    def local_digests(self, image: str) -> set[str]:
+        cmd = ["docker", "image", "inspect", "--format", "{{json .RepoDigests}}", image]
+        res = self.supervisor.run(cmd)
+        if not res.ok:
+            return set()
+        return {digest.split("@")[-1] for digest in json.loads(res.output[0]) or []}
+
+    def remote_digest(self, image: str, environment: dict[str, str]) -> str | None:
+        # `docker manifest inspect` re-serializes the manifest, imagetools prints
+        # the registry's descriptor which is what ends up in RepoDigests.
+        if not self.resolves_digests:
+            return None
+        cmd = ["docker", "buildx", "imagetools", "inspect", "--format"]
+        res = self.supervisor.run(
+            [*cmd, "{{.Manifest.Digest}}", image], env=os.environ | environment
+        ).check()
+        return res.output[0].strip() if res.output else None
+
+    def images(self) -> list[LocalImage]:
+        ids = self._run(["docker", "image", "ls", "-q", "--no-trunc"])
+        if not ids:
+            return []
+        return [
+            LocalImage(
+                id=attrs["Id"],
+                tags=attrs.get("RepoTags") or [],
+                digests=attrs.get("RepoDigests") or [],
+                size=attrs.get("Size", 0),
+                created=datetime.fromisoformat(attrs["Created"][:19])
+                .replace(tzinfo=timezone.utc)
+                .timestamp(),
+            )
+            for attrs in json.loads(
+                "\n".join(self._run(["docker", "image", "inspect", *set(ids)]))
+            )
+        ]
+
+    def used_images(self) -> set[str]:
+        ids = self._run(["docker", "container", "ls", "-aq", "--no-trunc"])
+        if not ids:
+            return set()
+        cmd = ["docker", "container", "inspect", "--format", "{{.Image}}", *ids]
+        return set(self._run(cmd))
+
+    def remove_image(self, reference: str) -> None:
+        self._run(["docker", "image", "rm", reference])
@@ -4,6 +4,7 @@ import random
 import string
 import uuid
 from pathlib import Path
+from typing import Literal
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field, SecretStr, field_serializer
@@ -18,6 +19,9 @@ if not CONFIG_PATH.exists():
     CONFIG_PATH.mkdir()
 
 CLI_CONFIG = CONFIG_PATH / "config.json"
+DIGEST_CACHE = CONFIG_PATH / "digests.json"
+UPDATE_CACHE = CONFIG_PATH / "update.json"
+IMAGE_CACHE = CONFIG_PATH / "images.json"
 
 
 class SslConfig(BaseModel):
@@ -43,9 +47,24 @@ class Settings(BaseModel):
     hive_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     hive_url: str = "https://github.com/caretech-owl/hive-config.git"
     hive_repo: Path = CONFIG_PATH / "hive-config"
+    clone_mode: Literal["full", "sparse"] = "full"
     auto_update_recipe: bool = True
     update_interval: int = 600
+    update_check_ttl: int = 3600
+    fetch_min_age: int = 60
+    status_verify_interval: int = 300
+    git_timeout: int = 120
     log_interval: int = 10
+    log_buffer_size: int = 500
+    metrics_interval: int = 5
+    metrics_history: int = 120
+    docker_backend: Literal["sdk", "cli"] = "sdk"
+    process_limit: int = 8
+    command_timeout: int = 900
+    startup_timeout: int = 300
+    pull_workers: int = 4
+    digest_ttl: int = 300
+    image_budget: int = 20 * 1024**3
     version: str = "0.0.0"
     server: ServerConfig = ServerConfig()
     log_level: str = "DEBUG"
@@ -1,24 +1,26 @@
 import logging
 import re
-from logging.handlers import MemoryHandler
+from concurrent.futures import Future
 from pathlib import Path
 from threading import Thread, Timer
 from time import sleep
 
-import yaml
 from pydantic import SecretStr
 
+from hive_cli import serialize
 from hive_cli.data import (
     COMPOSE_FILE_PATTERN,
     ComposerFile,
     DockerState,
     HiveData,
+    LogDelta,
     Recipe,
     RepoState,
 )
 from hive_cli.docker import DockerController
 from hive_cli.frontend import Frontend
 from hive_cli.gh import get_access_token, request_code
+from hive_cli.logs import LogBufferHandler, LogPublisher
 from hive_cli.repo import RepoController
 
 _LOGGER = logging.getLogger(__name__)
@@ -31,8 +33,10 @@ class Controller:
         self.hive = hive
         self.docker = DockerController(hive)
         self.repo = RepoController(hive)
+        self.git = self.repo.worker
         self.update_timer = Timer(hive.settings.update_interval, self.update)
         self.log_timer = Timer(hive.settings.log_interval, self.update_logs)
+        self._staging = False
         self.ui.events.save_recipe.connect(self._on_save_recipe)
         self.ui.events.save_compose.connect(self._on_save_compose)
         self.ui.events.update.connect(self.update)
@@ -45,23 +49,27 @@ class Controller:
         self.ui.events.reset_repo.connect(self._on_reset_recipe)
         self.ui.events.stop_docker.connect(self.docker.stop)
         self.ui.events.start_docker.connect(self.docker.start)
-        self.ui.events.initialize_repo.connect(self.repo.init_repo)
+        self.ui.events.initialize_repo.connect(self._on_initialize_repo)
         self.ui.events.commit_changes.connect(self._on_commit_changes)
         self.ui.events.update_recipe.connect(self.update_recipe)
         self.ui.events.update_client.connect(self.docker.update_cli)
-        self.log_handler: MemoryHandler | None = next(
+        self.log_handler: LogBufferHandler | None = next(
             (
                 handler
                 for handler in logging.getLogger("hive_cli").handlers
-                if isinstance(handler, MemoryHandler)
+                if isinstance(handler, LogBufferHandler)
             ),
             None,
         )
+        if self.log_handler is not None:
+            publisher = LogPublisher(hive, "client_logs_delta", self.log_handler.buffer)
+            self.log_handler.on_append = publisher.request
+            publisher.publish()
+        self._container_logs: list[str] | None = None
         self.load_recipe()
 
     def _on_change_num_log_cli(self, num: int) -> None:
         self.hive.client_logs_num = num
-        self.update_logs()
 
     def _on_change_num_log_container(self, num: int) -> None:
         self.hive.container_logs_num = num
@@ -93,7 +101,7 @@ class Controller:
                     raise ValueError(msg)
             recipe.save()
             self.set_recipe(recipe)
-            self.repo.update_state()
+            self.refresh_repo_state()
             self.ui.notify("Recipe updated", type="positive")
         except Exception as e:
             _LOGGER.error("Error parsing recipe: %s", e)
@@ -103,12 +111,12 @@ class Controller:
         try:
             compose_file = ComposerFile.model_validate_json(config)
             compose_file.save(path)
-            self.ui.repo_status.refresh()
+            self.ui.refresher.mark("repo_status")
             self.ui.notify("Compose file updated", type="positive")
         except Exception as e:
             _LOGGER.error("Error parsing compose: %s", e)
             self.ui.notify(str(e), type="negative")
-        self.repo.update_state()
+        self.refresh_repo_state()
 
     def _on_save_settings(self) -> None:
         if self.hive.docker_state != DockerState.STOPPED:
@@ -122,6 +130,25 @@ class Controller:
         self.load_recipe()
         self.ui.notify("Settings updated", type="positive")
 
+    def _on_initialize_repo(self) -> None:
+        self.git.submit(
+            "clone",
+            self.repo.init_repo,
+            timeout=self.hive.settings.command_timeout,
+            updating=True,
+        )
+
+    def _commit_changes(self) -> None:
+        def _done(future: Future) -> None:
+            if future.exception() is None:
+                self.ui.notify("Changes committed", type="positive")
+            else:
+                self.ui.notify(f"Commit failed: {future.exception()}", type="negative")
+
+        self.git.submit(
+            "commit", self.repo.commit_changes, timeout=self.hive.settings.git_timeout
+        ).add_done_callback(_done)
+
     def _on_commit_changes(self) -> None:
 
         if self.hive.settings.github_token is None:
@@ -140,68 +167,132 @@ class Controller:
                 if access_token:
                     self.hive.settings.github_token = SecretStr(access_token)
                     self.hive.settings.save()
-                    self.repo.commit_changes()
-                    self.ui.notify("Changes committed.", type="positive")
+                    self._commit_changes()
 
             Thread(target=_wait_for_token).start()
 
         else:
-            self.repo.commit_changes()
-            self.ui.notify("Changes committed", type="positive")
+            self._commit_changes()
 
     def _on_reset_recipe(self) -> None:
-        self.repo.reset_repo()
-        self.load_recipe()
+        def _reset() -> None:
+            self.repo.reset_repo()
+            self.load_recipe()
+
+        self.git.submit("reset", _reset)
+
+    def incoming_images(self) -> list[str]:
+        """Images of the recipe and its compose files on origin/main."""
+        recipe_file = self.hive.settings.hive_repo / f"{self.hive.settings.hive_id}.yml"
+        content = self.repo.remote_file(recipe_file.name)
+        if content is None:
+            return []
+        obj = serialize.load(content)
+        obj["path"] = recipe_file
+        recipe = Recipe.model_validate(obj)
+        images: list[str] = []
+        for local_path in recipe.compose:
+            # absolute paths are not part of the repo
+            if local_path.startswith("/"):
+                continue
+            compose = self.repo.remote_file(local_path)
+            if compose is None:
+                continue
+            for image in ComposerFile.model_validate(serialize.load(compose)).images:
+                if image not in images:
+                    images.append(image)
+        return images
 
     def update_recipe(self) -> None:
+        if self._staging:
+            return
         _LOGGER.info("Recipe was changed remotely. Updating...")
+        self._staging = True
 
         def _update_recipe() -> None:
-            self.hive.repo_state = RepoState.UPDATING
-            self.repo.update_repo()
-            self.hive.repo_state = RepoState.UPDATING
-            self.load_recipe()
+            try:
+                self.repo.update_repo()
+                self.hive.repo_state = RepoState.UPDATING
+                self.load_recipe()
+            finally:
+                self._staging = False
+
+        def _switch() -> None:
+            try:
+                self.git.submit(
+                    "update recipe",
+                    _update_recipe,
+                    timeout=self.hive.settings.git_timeout,
+                    updating=True,
+                )
+            except Exception:
+                self._staging = False
+                raise
+
+        def _stage() -> None:
+            try:
+                images = self.incoming_images()
+            except Exception as e:
+                _LOGGER.warning("Cannot read incoming recipe: %s", e)
+                images = []
+            if images and self.docker.client is not None:
+                # the current stack keeps serving while the new images are pulled
+                _LOGGER.info(
+                    "Pre-pulling %d images of the incoming recipe", len(images)
+                )
+                self.docker.pull(images, _switch)
+            else:
+                _switch()
 
-        Thread(target=_update_recipe).start()
+        def _staged(future: Future) -> None:
+            if future.exception() is not None:
+                self._staging = False
+
+        self.git.submit("stage recipe", _stage).add_done_callback(_staged)
 
     def update(self) -> None:
         _LOGGER.debug("Update triggered")
         self.update_timer.cancel()
         self.docker.check_cli_update()
+        self.git.submit(
+            "update state",
+            self._update_repo_state,
+            timeout=self.hive.settings.git_timeout,
+        )
+        self.docker.evict_images()
+        self.update_timer = Timer(self.hive.settings.update_interval, self.update)
+        self.update_timer.start()
+
+    def refresh_repo_state(self) -> None:
+        """Derive the repo state from the local clone on the git worker."""
+        self.git.submit("refresh state", self.repo.update_state, False)
+
+    def _update_repo_state(self) -> None:
         self.repo.update_state()
         if (
             self.hive.repo_state == RepoState.UPDATE_AVAILABLE
             and self.hive.settings.auto_update_recipe
         ):
             self.update_recipe()
-        self.update_timer = Timer(self.hive.settings.update_interval, self.update)
-        self.update_timer.start()
 
     def update_logs(self) -> None:
         _LOGGER.debug("Refresh logs")
         self.log_timer.cancel()
-        container_logs = self.docker.get_container_logs(self.hive.container_logs_num)
-        cli_logs = (
-            [
-                self.log_handler.format(record)
-                for record in self.log_handler.buffer[-self.hive.client_logs_num :]
-            ]
-            if self.log_handler
-            else []
-        )
-        self.hive.client_logs = cli_logs
-        self.hive.container_logs = container_logs
-        self.ui.log_status.refresh()
+        if self.docker.logs.active:
+            # the follow session publishes lines as they arrive
+            self._container_logs = None
+        else:
+            lines = self.docker.get_container_logs(self.hive.container_logs_num)
+            if lines != self._container_logs:
+                self._container_logs = lines
+                self.hive.container_logs_delta = LogDelta(appended=lines, reset=True)
         self.log_timer = Timer(self.hive.settings.log_interval, self.update_logs)
         self.log_timer.start()
 
     def load_recipe(self) -> None:
         recipe_file = self.hive.settings.hive_repo / f"{self.hive.settings.hive_id}.yml"
         if recipe_file.exists():
-            with recipe_file.open("r") as f:
-                obj = yaml.safe_load(f)
-                obj["path"] = recipe_file
-                recipe = Recipe.model_validate(obj)
+            recipe = Recipe.load(recipe_file)
         else:
             _LOGGER.warning("File %s not found.", recipe_file.resolve())
             recipe = None
@@ -212,18 +303,25 @@ class Controller:
             self.hive.recipe = recipe
         else:
             self.hive.events.recipe.emit(recipe)
-        self.repo.update_state()
+        self.refresh_repo_state()
         self.docker.start()
 
     def set_recipe(self, recipe: Recipe | None) -> None:
-        if self.hive.docker_state == DockerState.STARTED:
+        if self.docker.can_reconcile(self.hive.recipe, recipe):
+            if self.hive.recipe != recipe:
+                self.hive.recipe = recipe
+            else:
+                self.hive.events.recipe.emit(recipe)
+            self.refresh_repo_state()
+            self.docker.reconcile()
+        elif self.hive.docker_state == DockerState.STARTED:
             self.docker.stop(lambda: self._defered_set_recipe(recipe))
         else:
             if self.hive.recipe != recipe:
                 self.hive.recipe = recipe
             else:
                 self.hive.events.recipe.emit(recipe)
-            self.repo.update_state()
+            self.refresh_repo_state()
             self.docker.update_container_states()
 
     def __enter__(self) -> None:
@@ -233,3 +331,5 @@ class Controller:
     def __exit__(self, exc_type, exc_value, traceback) -> None:  # noqa: ANN001
         self.update_timer.cancel()
         self.log_timer.cancel()
+        self.docker.shutdown()
+        self.repo.shutdown()
@@ -1,16 +1,23 @@
 import enum
 import logging
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime, timezone
 from pathlib import Path
+from threading import Lock
 
-import yaml
 from psygnal import EventedModel
-from pydantic import BaseModel, Field, field_serializer
+from pydantic import BaseModel, Field, PrivateAttr, field_serializer
 
+from hive_cli import serialize
 from hive_cli.config import Settings
+from hive_cli.documents import get_document_cache
 
 _LOGGER = logging.getLogger(__name__)
 
 COMPOSE_FILE_PATTERN = r"compose/[a-zA-Z0-9_-]+\.yml"
+COMPOSE_PLAN_CACHE_SIZE = 4
 
 
 class ComposerService(BaseModel):
@@ -24,6 +31,17 @@ class ComposerService(BaseModel):
     entrypoint: list[str] | None = None
     runtime: str | None = None
 
+    def publishes(self, port: int) -> bool:
+        """Whether one of the port mappings publishes `port` on the host."""
+        for mapping in self.ports or []:
+            parts = str(mapping).split("/")[0].split(":")
+            if len(parts) < 2:
+                continue
+            first, _, last = parts[-2].partition("-")
+            if first.isdigit() and int(first) <= port <= int(last or first):
+                return True
+        return False
+
 
 class ComposerNetwork(BaseModel):
     name: str
@@ -43,7 +61,7 @@ class ComposerFile(BaseModel):
         _LOGGER.info("Saving composer file to %s", path.absolute())
         with path.open("w") as f:
             obj = self.model_dump(exclude_none=True)
-            f.write(yaml.dump(obj))
+            f.write(serialize.dump(obj))
 
     @property
     def images(self) -> list[str]:
@@ -55,6 +73,7 @@ class Endpoint(BaseModel):
     port: int
     protocol: str = "http"
     icon: str | None = None
+    service: str | None = None
 
 
 class Recipe(BaseModel):
@@ -67,28 +86,136 @@ class Recipe(BaseModel):
     def serialize_path(self, path: Path) -> str:
         return path.absolute().as_posix()
 
-    def composer_files(self) -> dict[Path, ComposerFile | None]:
-        files: dict[Path, ComposerFile | None] = {}
-        for local_path in self.compose:
+    @property
+    def project_name(self) -> str | None:
+        """Name docker compose assigns to the stack of this recipe."""
+        name = (os.environ | self.environment).get("COMPOSE_PROJECT_NAME")
+        if name is None:
+            if not self.compose:
+                return None
+            # compose uses the directory of the first file as project directory
+            local_path = self.compose[0]
             path = (
                 Path(local_path)
                 if local_path.startswith("/")
                 else self.path.parent / local_path
             ).resolve()
-            if not path.exists():
-                files[path] = None
-                continue
-            with path.open("r") as f:
-                yaml_obj = yaml.safe_load(f)
-                files[path] = ComposerFile.model_validate(yaml_obj)
-        return files
+            name = path.parent.name
+        return re.sub(r"[^a-z0-9_-]", "", name.lower()).lstrip("_-") or None
+
+    def composer_files(self) -> dict[Path, ComposerFile | None]:
+        return self.plan().files
+
+    def images(self) -> list[str]:
+        """Return the images of all compose files without duplicates."""
+        return self.plan().images
+
+    def plan(self) -> "ComposePlan":
+        return ComposePlan.of(self)
+
+    def endpoint_service(self, endpoint: Endpoint) -> str | None:
+        """Service backing `endpoint`, inferred from published ports if not set."""
+        if endpoint.service is not None:
+            return endpoint.service
+        for compose in self.plan().files.values():
+            for name, service in (compose.services if compose else {}).items():
+                if service.publishes(endpoint.port):
+                    return name
+        return None
+
+    @classmethod
+    def load(cls, path: Path) -> "Recipe":
+        """Load a recipe through the process-wide document cache."""
+        return get_document_cache().load(path, cls, path=path)
 
     def save(self) -> None:
         _LOGGER.info("Saving recipe to %s", self.path.absolute())
         with self.path.open("w") as f:
             obj = self.model_dump(exclude_none=True)
             del obj["path"]
-            f.write(yaml.dump(obj))
+            f.write(serialize.dump(obj))
+
+
+class ComposePlan:
+    """Resolved compose setup of a recipe.
+
+    Plans are cached per recipe object and rebuilt when the recipe's compose
+    list changes or when the size or mtime of one of its files changes.
+    """
+
+    _cache: OrderedDict[int, "ComposePlan"] = OrderedDict()
+    _lock = Lock()
+
+    def __init__(self, recipe: Recipe) -> None:
+        self.recipe = recipe
+        self.compose = tuple(recipe.compose)
+        self.cwd = recipe.path.parent
+        self.paths = [
+            (
+                Path(local_path)
+                if local_path.startswith("/")
+                else self.cwd / local_path
+            ).resolve()
+            for local_path in recipe.compose
+        ]
+        self.signature = self._stat()
+        self.files: dict[Path, ComposerFile | None] = {}
+        for path, stat in zip(self.paths, self.signature, strict=True):
+            if stat is None:
+                self.files[path] = None
+                continue
+            try:
+                self.files[path] = get_document_cache().load(path, ComposerFile)
+            except FileNotFoundError:
+                self.files[path] = None
+        self.images = list(
+            dict.fromkeys(
+                image
+                for compose in self.files.values()
+                if compose is not None
+                for image in compose.images
+            )
+        )
+        self.command = ["docker", "compose"]
+        for path, compose in self.files.items():
+            if compose is not None:
+                self.command.extend(["-f", path.as_posix()])
+
+    @property
+    def valid(self) -> bool:
+        return len(self.command) > 2
+
+    def _stat(self) -> tuple[tuple[int, int] | None, ...]:
+        signature: list[tuple[int, int] | None] = []
+        for path in self.paths:
+            try:
+                stat = path.stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def is_current(self, recipe: Recipe) -> bool:
+        return (
+            recipe is self.recipe
+            and tuple(recipe.compose) == self.compose
+            and self._stat() == self.signature
+        )
+
+    @classmethod
+    def of(cls, recipe: Recipe) -> "ComposePlan":
+        with cls._lock:
+            plan = cls._cache.get(id(recipe))
+            if plan is not None and plan.is_current(recipe):
+                cls._cache.move_to_end(id(recipe))
+                return plan
+        _LOGGER.debug("Resolving compose plan for %s", recipe.path.name)
+        plan = cls(recipe)
+        with cls._lock:
+            cls._cache[id(recipe)] = plan
+            while len(cls._cache) > COMPOSE_PLAN_CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        return plan
 
 
 class RepoState(enum.Enum):
@@ -135,15 +262,168 @@ class ContainerState(BaseModel):
     state: str = Field(alias="State")
     service: str = Field(alias="Service")
 
+    @classmethod
+    def from_attrs(cls, attrs: dict) -> "ContainerState":
+        """Create a state from the engine's container inspect result."""
+        state = attrs.get("State", {})
+        config = attrs.get("Config", {})
+        mounts = attrs.get("Mounts", [])
+        health = (state.get("Health") or {}).get("Status", "")
+        if state.get("Running"):
+            started = datetime.fromisoformat(state["StartedAt"][:19]).replace(
+                tzinfo=timezone.utc
+            )
+            # event driven states are not re-rendered, so avoid relative times
+            status = f"Up since {started:%Y-%m-%d %H:%M} UTC"
+            if health:
+                status += f" ({health})"
+        else:
+            status = f"{state.get('Status', '').capitalize()} ({state.get('ExitCode')})"
+        return cls.model_validate(
+            {
+                "Command": " ".join([attrs.get("Path", ""), *attrs.get("Args", [])]),
+                "CreatedAt": attrs.get("Created", ""),
+                "ExitCode": state.get("ExitCode", 0),
+                "Health": health,
+                "ID": attrs.get("Id", ""),
+                "Image": config.get("Image", ""),
+                "LocalVolumes": str(
+                    sum(1 for mount in mounts if mount.get("Type") == "volume")
+                ),
+                "Mounts": ",".join(
+                    mount.get("Name") or mount.get("Source", "") for mount in mounts
+                ),
+                "Name": attrs.get("Name", "").lstrip("/"),
+                "Status": status,
+                "State": state.get("Status", ""),
+                "Service": (config.get("Labels") or {}).get(
+                    "com.docker.compose.service", ""
+                ),
+            }
+        )
+
+
+class ContainerMetrics(BaseModel):
+    cpu: float = 0
+    memory: int = 0
+    memory_limit: int = 0
+    net_rx: int = 0
+    net_tx: int = 0
+    blk_read: int = 0
+    blk_write: int = 0
+    cpu_history: list[float] = []
+    memory_history: list[float] = []
+
+
+class PullProgress(BaseModel):
+    images: int = 0
+    finished: int = 0
+    done: int = 0
+    total: int = 0
+    throughput: float = 0
+    eta: float | None = None
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 0
+
+
+class ServiceHealth(BaseModel):
+    status: str = "starting"
+    time_to_healthy: float | None = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.status == "healthy"
+
+
+class LocalImage(BaseModel):
+    id: str
+    tags: list[str] = []
+    digests: list[str] = []
+    size: int = 0
+    created: float = 0
+
+
+class ImageCacheStats(BaseModel):
+    usage: int = 0
+    budget: int = 0
+    reclaimed: int = 0
+    evicted: int = 0
+    checked: datetime | None = None
+
+
+class OperationStats(BaseModel):
+    queue_depth: int = 0
+    completed: int = 0
+    coalesced: int = 0
+    latency: dict[str, float] = {}
+
+
+class ContainerDelta(BaseModel):
+    seq: int = 0
+    added: list[str] = []
+    changed: list[str] = []
+    removed: list[str] = []
+
+
+class LogDelta(BaseModel):
+    """Lines appended to a log; `seq` is the sequence number of the last one.
+
+    `reset` means all lines published before are replaced by `appended`.
+    """
+
+    seq: int = 0
+    appended: list[str] = []
+    reset: bool = False
+
+
+def state_hashes(states: list[ContainerState]) -> dict[str, int]:
+    return {state.id: hash(tuple(state.model_dump().values())) for state in states}
+
 
 class HiveData(EventedModel):
     settings: Settings
     repo_state: RepoState = RepoState.UNKNOWN
+    repo_progress: str | None = None
     docker_state: DockerState = DockerState.UNKNOWN
+    pull_progress: PullProgress | None = None
+    operation_stats: OperationStats = OperationStats()
+    image_cache: ImageCacheStats | None = None
     client_state: ClientState = ClientState.UNKNOWN
+    client_checked: datetime | None = None
     container_states: list[ContainerState] = []
-    container_logs: list[str] = []
+    container_delta: ContainerDelta = ContainerDelta()
+    container_metrics: dict[str, ContainerMetrics] = {}
+    service_health: dict[str, ServiceHealth] = {}
+    container_logs_delta: LogDelta = LogDelta()
     container_logs_num: int = 20
-    client_logs: list[str] = []
+    client_logs_delta: LogDelta = LogDelta()
     client_logs_num: int = 20
     recipe: Recipe | None = None
+    _container_hashes: dict[str, int] = PrivateAttr(default_factory=dict)
+
+    def set_container_states(self, states: list[ContainerState]) -> bool:
+        """Assign `states` if any container changed and publish the delta.
+
+        Snapshots are compared by per-container hashes instead of field by
+        field; returns whether anything changed.
+        """
+        hashes = state_hashes(states)
+        old = self._container_hashes
+        if hashes == old:
+            return False
+        names = {state.id: state.name for state in [*self.container_states, *states]}
+        self._container_hashes = hashes
+        self.container_states = states
+        self.container_delta = ContainerDelta(
+            seq=self.container_delta.seq + 1,
+            added=[names[key] for key in hashes.keys() - old.keys()],
+            changed=[
+                names[key]
+                for key in hashes.keys() & old.keys()
+                if hashes[key] != old[key]
+            ],
+            removed=[names[key] for key in old.keys() - hashes.keys()],
+        )
+        return True
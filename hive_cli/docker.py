@@ -1,16 +1,32 @@
 import logging
 import os
-import subprocess
-from pathlib import Path
-from threading import Thread
+from concurrent.futures import Future
+from time import monotonic
 from typing import Callable
 
 import docker
 import docker.models
 import docker.models.images
 
-from hive_cli import __version__
-from hive_cli.data import ClientState, ContainerState, DockerState, HiveData
+from hive_cli.backend import Backend, CliBackend, SdkBackend
+from hive_cli.data import (
+    ClientState,
+    ComposePlan,
+    ContainerState,
+    DockerState,
+    HiveData,
+    Recipe,
+)
+from hive_cli.images import ImageCache
+from hive_cli.logs import LogFollower
+from hive_cli.metrics import MetricsCollector
+from hive_cli.operations import OperationKind, OperationScheduler
+from hive_cli.process import ProcessResult, get_supervisor
+from hive_cli.pull import ImagePuller
+from hive_cli.reconcile import StackDiff, plan_services
+from hive_cli.startup import StartupTracker
+from hive_cli.tracker import ContainerTracker
+from hive_cli.update import CLI_IMAGE, UpdateChecker
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,42 +36,52 @@ class DockerController:
     def __init__(self, hive: HiveData) -> None:
         self.hive = hive
         self.client = None
-        self._runner: Thread | None = None
+        self.supervisor = get_supervisor()
+        self.backend: Backend = CliBackend(
+            self.supervisor, hive.settings.command_timeout
+        )
+        self.tracker: ContainerTracker | None = None
+        self.metrics: MetricsCollector | None = None
+        self.logs = LogFollower(hive, self.compose_stream)
+        self.startup = StartupTracker(hive, self._poll_container_states)
+        self._deployed: ComposePlan | None = None
+        self.hive.events.docker_state.connect(self._on_docker_state_change)
         try:
             self.client = docker.from_env()
+            if hive.settings.docker_backend == "sdk":
+                backend = SdkBackend(self.client)
+                self.backend = backend
+                self.tracker = ContainerTracker(hive, backend)
+            self.metrics = MetricsCollector(hive, self.client)
+            self.hive.events.container_states.connect(self.metrics.follow)
             self.update_container_states()
         except Exception as e:
             _LOGGER.error(e)
             self.hive.docker_state = DockerState.NOT_AVAILABLE
+        self.puller = ImagePuller(hive, self.backend)
+        self.updates = UpdateChecker(hive, self.backend)
+        self.image_cache = ImageCache(hive, self.backend)
+        self.operations = OperationScheduler(
+            hive,
+            {
+                OperationKind.START: self._task_start,
+                OperationKind.STOP: self._task_stop,
+                OperationKind.RESTART: self._task_restart,
+                OperationKind.PULL: self.puller.pull,
+                OperationKind.RECONCILE: self._task_reconcile,
+                OperationKind.CHECK_UPDATE: self.updates.check,
+                OperationKind.UPDATE_CLI: self._task_update,
+                OperationKind.EVICT_IMAGES: self._task_evict,
+            },
+        )
 
     def get_container_states(self) -> list[ContainerState]:
         recipe = self.hive.recipe
         if recipe is None:
             return []
 
-        cmd = ["docker", "compose"]
-        for composer_file in recipe.compose:
-            path = (
-                Path(composer_file)
-                if composer_file.startswith("/")
-                else recipe.path.parent / composer_file
-            ).resolve()
-            if path.exists():
-                cmd.extend(["-f", composer_file])
-        if len(cmd) == 2:
-            _LOGGER.error("No valid composer files found.")
-            return []
-        cmd.extend(["ps", "--format", "json"])
-        _LOGGER.debug("Running command: %s", " ".join(cmd))
         try:
-            res = subprocess.check_output(
-                cmd,
-                cwd=recipe.path.parent,
-                env=os.environ | recipe.environment,
-            ).decode("utf-8")
-            return [
-                ContainerState.model_validate_json(line) for line in res.splitlines()
-            ]
+            return self.backend.containers(recipe)
         except Exception as e:
             _LOGGER.error(e)
             self.hive.docker_state = DockerState.UNKNOWN
@@ -64,112 +90,167 @@ class DockerController:
     def get_container_logs(self, num_entries: int) -> list[str]:
         if self.hive.recipe is None:
             return []
+        if self.logs.active:
+            return self.logs.buffer.tail(num_entries)
+        try:
+            return self.backend.logs(self.hive.recipe, num_entries)
+        except Exception as e:
+            _LOGGER.warning("Cannot read container logs: %s", e)
+            return []
 
-        pipe = self.compose_do("logs", "--no-color", "-n", str(num_entries))
-        if pipe is not None and pipe.stdout is not None:
-            return [line.decode("utf-8").strip() for line in pipe.stdout]
-        return []
+    def _on_docker_state_change(self, state: DockerState) -> None:
+        if state == DockerState.STARTED:
+            self.logs.start()
+        elif state != DockerState.STARTING:
+            self.logs.stop()
 
     def _task_update(self) -> None:
         if self.hive.recipe is not None:
-            cmd = ["docker", "pull", "ghcr.io/caretech-owl/hive-cli:latest"]
-            _LOGGER.debug("Running command: %s", " ".join(cmd))
-            subprocess.run(cmd, env=os.environ | self.hive.recipe.environment)
+            _LOGGER.info("Updating hive-cli")
+            self.hive.client_state = ClientState.UPDATING
+            try:
+                self.backend.pull(f"{CLI_IMAGE}:latest", self.hive.recipe.environment)
+            except Exception as e:
+                _LOGGER.error("Error pulling hive-cli: %s", e)
             with (self.hive.settings.hive_repo.parent / "_restart").open("w+"):
                 pass
             _LOGGER.info("hive-cli update complete")
             self.hive.client_state = ClientState.RESTART_REQUIRED
 
     def update_cli(self) -> None:
-        _LOGGER.info("Updating hive-cli")
-        self.hive.client_state = ClientState.UPDATING
-        thread = Thread(target=self._task_update)
-        thread.start()
+        self.operations.submit(OperationKind.UPDATE_CLI)
 
     def _task_start(self) -> None:
         recipe = self.hive.recipe
-        if recipe is None:
+        if recipe is None or self.hive.docker_state != DockerState.STOPPED:
             return
-        for composer_file in recipe.composer_files().values():
-            if composer_file is None:
-                continue
-            for image_name in composer_file.images:
-                _LOGGER.info("Pulling image: %s", image_name)
-                pipe = self.compose_do("pull", image_name)
-                if pipe is not None and pipe.stdout is not None:
-                    for line in pipe.stdout:
-                        _LOGGER.debug(line.decode("utf-8").strip())
-                else:
-                    _LOGGER.warning("Received no output from Docker Compose")
+        _LOGGER.info("Starting Docker")
+        self.hive.docker_state = DockerState.PULLING
+        plan = recipe.plan()
+        self.puller.pull(plan.images)
         _LOGGER.info("Starting Docker Compose")
         self.hive.docker_state = DockerState.STARTING
-        pipe = self.compose_do("up", "-d")
-        if pipe is not None and pipe.stdout is not None:
-            for line in pipe.stdout:
-                _LOGGER.debug(line.decode("utf-8").strip())
-        else:
-            _LOGGER.warning("Received no output from Docker Compose")
-        self.update_container_states()
-
-    def _task_stop(self, cb: Callable | None) -> None:
-        _LOGGER.info("Stopping Docker Compose")
-        pipe = self.compose_do("down")
-        if pipe is not None and pipe.stdout is not None:
-            for line in pipe.stdout:
-                _LOGGER.debug(line.decode("utf-8").strip())
-        else:
-            _LOGGER.warning("Received no output from Docker Compose")
-        self.update_container_states()
-        if cb is not None:
-            cb()
-
-    def _task_manifest(self) -> None:
-        _LOGGER.info("Checking for hive-cli updates")
-        cmd = ["docker", "manifest", "inspect"]
-        recipe = self.hive.recipe
-        try:
-            local = subprocess.check_output(
-                cmd + [f"ghcr.io/caretech-owl/hive-cli:{__version__}"],
-                env=os.environ | recipe.environment if recipe else os.environ,
-            )
-        except Exception as e:
-            _LOGGER.warning(e)
-            local = None
-        try:
-            remote = subprocess.check_output(
-                cmd + ["ghcr.io/caretech-owl/hive-cli:latest"],
-                env=os.environ | recipe.environment if recipe else os.environ,
+        self._deployed = plan
+        started = monotonic()
+        self.compose_do("up", "-d")
+        self.update_container_states(sync=True)
+        self.startup.begin(sorted(plan_services(plan)), started)
+
+    def _task_reconcile(self) -> None:
+        if self._deployed is None or self.hive.recipe is None:
+            _LOGGER.warning("Reconciliation requires a deployed stack and a recipe.")
+            return
+        plan = self.hive.recipe.plan()
+        diff = StackDiff(self._deployed, plan)
+        _LOGGER.info("Reconciling stack (%s)", diff)
+        self._deployed = plan
+        self.hive.docker_state = DockerState.PULLING
+        self.puller.pull(diff.images)
+        _LOGGER.info("Recreating services %s", sorted(diff.recreate))
+        self.hive.docker_state = DockerState.STARTING
+        started = monotonic()
+        if diff.recreate:
+            self.compose_do(
+                "up", "-d", "--no-deps", "--force-recreate", *sorted(diff.recreate)
             )
-            if local != remote:
-                _LOGGER.info("hive-cli update available")
-                self.hive.client_state = ClientState.UPDATE_AVAILABLE
-            else:
-                _LOGGER.info("hive-cli is up to date")
-        except Exception as e:
-            _LOGGER.warning(e)
+        # the diff only covers modelled keys, compose applies any other change
+        # itself and leaves unchanged services running
+        self.compose_do("up", "-d", "--remove-orphans")
+        self.update_container_states(sync=True)
+        self.startup.begin(sorted(diff.recreate), started)
+
+    def _task_stop(self) -> None:
+        if self.hive.docker_state != DockerState.STARTED:
+            return
+        _LOGGER.info("Stopping Docker Compose")
+        self.hive.docker_state = DockerState.STOPPING
+        self._deployed = None
+        self.startup.stop()
+        self.compose_do("down")
+        self.update_container_states(sync=True)
+
+    def _task_restart(self) -> None:
+        self._task_stop()
+        self._task_start()
 
     def start(self) -> None:
-        if self.hive.docker_state == DockerState.STOPPED:
-            _LOGGER.info("Starting Docker")
-            self.hive.docker_state = DockerState.PULLING
-            self._runner = Thread(target=self._task_start)
-            self._runner.start()
+        self.operations.submit(OperationKind.START)
 
     def stop(self, cb: Callable | None = None) -> None:
-        if self.hive.docker_state == DockerState.STARTED:
-            self.hive.docker_state = DockerState.STOPPING
-            self._runner = Thread(target=self._task_stop, args=(cb,))
-            self._runner.start()
+        """Queue a stop; `cb` runs on the operation worker once it finished."""
+        self.operations.submit(OperationKind.STOP, callback=cb)
+
+    def pull(self, images: list[str], cb: Callable | None = None) -> None:
+        """Queue a pull; `cb` runs on the operation worker once it finished."""
+        self.operations.submit(OperationKind.PULL, images=images, callback=cb)
+
+    def can_reconcile(self, old: Recipe | None, new: Recipe | None) -> bool:
+        """Whether a running stack can be moved to `new` service by service."""
+        return (
+            self.hive.docker_state == DockerState.STARTED
+            and self._deployed is not None
+            and old is not None
+            and new is not None
+            and old.project_name == new.project_name
+            and old.environment == new.environment
+            and new.plan().valid
+        )
+
+    def reconcile(self) -> None:
+        """Recreate only services that changed since the stack was deployed."""
+        self.operations.submit(OperationKind.RECONCILE)
 
-    def update_container_states(self) -> None:
-        self.hive.container_states = self.get_container_states()
+    def _poll_container_states(self) -> None:
+        # the event tracker publishes changes as they happen
+        if self.tracker is None or not self.tracker.active:
+            self.update_container_states()
+
+    def update_container_states(self, sync: bool = False) -> None:
+        """Publish the container states of the recipe's project.
+
+        With `sync` the event tracker lists the project again instead of
+        relying on events, which may not have arrived after a compose command.
+        """
+        states = None
+        if self.tracker is not None:
+            recipe = self.hive.recipe
+            try:
+                self.tracker.follow(recipe.project_name if recipe else None)
+                if sync:
+                    self.tracker.sync()
+                states = self.tracker.states
+            except Exception as e:
+                _LOGGER.warning("Cannot track container events: %s", e)
+                self.tracker.stop()
+        self.hive.set_container_states(
+            states if states is not None else self.get_container_states()
+        )
         self.hive.docker_state = (
             DockerState.STARTED if self.hive.container_states else DockerState.STOPPED
         )
 
+    def shutdown(self) -> None:
+        self.operations.stop()
+        self.startup.stop()
+        self.logs.stop()
+        if self.metrics is not None:
+            self.metrics.stop()
+        if self.tracker is not None:
+            self.tracker.stop()
+
     def check_cli_update(self) -> None:
-        self._runner = Thread(target=self._task_manifest)
-        self._runner.start()
+        self.operations.submit(OperationKind.CHECK_UPDATE)
+
+    def _task_evict(self) -> None:
+        if (
+            self.hive.docker_state in [DockerState.STARTED, DockerState.STOPPED]
+            and self.hive.pull_progress is None
+        ):
+            self.image_cache.evict()
+
+    def evict_images(self) -> None:
+        """Queue an eviction; it is skipped while the stack is changing."""
+        self.operations.submit(OperationKind.EVICT_IMAGES)
 
     @property
     def images(self) -> list[docker.models.images.Image]:
@@ -177,20 +258,45 @@ class DockerController:
             return []
         return self.client.images.list()
 
-    def compose_do(self, *commands: str) -> subprocess.Popen | None:
+    def _compose_command(self, *commands: str) -> list[str] | None:
         if self.hive.recipe is None:
             _LOGGER.error("No recipe set.")
             return None
-        cmd = ["docker", "compose"]
-        for composer_file in self.hive.recipe.compose:
-            cmd.extend(["-f", composer_file])
-        cmd.extend(commands)
-        _LOGGER.debug("Running command: %s", " ".join(cmd))
+        plan = self.hive.recipe.plan()
+        if not plan.valid:
+            _LOGGER.error("No valid composer files found.")
+            return None
+        return [*plan.command, *commands]
+
+    def compose_do(self, *commands: str) -> ProcessResult | None:
+        cmd = self._compose_command(*commands)
+        if cmd is None or self.hive.recipe is None:
+            return None
+        res = self.supervisor.run(
+            cmd,
+            cwd=self.hive.recipe.path.parent,
+            env=os.environ | self.hive.recipe.environment,
+            timeout=self.hive.settings.command_timeout,
+        )
+        if not res.ok:
+            _LOGGER.warning(
+                "Docker Compose %s failed: %s",
+                commands[0],
+                res.output[-1] if res.output else res.returncode,
+            )
+        return res
 
-        return subprocess.Popen(
+    def compose_stream(
+        self, *commands: str, on_line: Callable[[str], None]
+    ) -> Future[ProcessResult] | None:
+        """Run a long-lived compose command; cancel the future to stop it."""
+        cmd = self._compose_command(*commands)
+        if cmd is None or self.hive.recipe is None:
+            return None
+        return self.supervisor.submit(
             cmd,
-            cwd=self.hive.settings.hive_repo,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
+            cwd=self.hive.recipe.path.parent,
             env=os.environ | self.hive.recipe.environment,
+            timeout=None,
+            on_line=on_line,
         )
@@ -0,0 +1,77 @@
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import TypeVar
+
+from pydantic import BaseModel
+
+from hive_cli import serialize
+
+_LOGGER = logging.getLogger(__name__)
+
+DOCUMENT_CACHE_SIZE = 64
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+class DocumentCache:
+    """Validated models of YAML files shared by the whole process.
+
+    Entries are keyed by path and model type and are reused as long as mtime,
+    size and inode of the file are unchanged. Returned models are shared and
+    must not be modified in place.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[
+            tuple[Path, type[BaseModel]], tuple[tuple[int, int, int], BaseModel]
+        ] = OrderedDict()
+        self._lock = Lock()
+
+    def load(self, file: Path, model: type[Model], **extra: object) -> Model:
+        """Return `file` validated as `model`.
+
+        `extra` fields are added to the parsed document before validation.
+        Raises `FileNotFoundError` if the file does not exist.
+        """
+        path = file.resolve()
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        key = (path, model)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]  # type: ignore[return-value]
+            self.misses += 1
+        _LOGGER.debug("Parsing %s", path)
+        with path.open("r") as f:
+            obj = serialize.load(f) or {}
+        document = model.model_validate(obj | extra)
+        with self._lock:
+            self._entries[key] = (signature, document)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return document
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class _Instance:
+    cache: DocumentCache | None = None
+    lock = Lock()
+
+
+def get_document_cache() -> DocumentCache:
+    with _Instance.lock:
+        if _Instance.cache is None:
+            _Instance.cache = DocumentCache(DOCUMENT_CACHE_SIZE)
+        return _Instance.cache
@@ -4,8 +4,9 @@ import os
 import signal
 from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING, Literal
+from typing import TYPE_CHECKING, Callable, Literal
 
+import humanize
 from fastapi import FastAPI
 from nicegui import app, ui
 from nicegui.elements.mixins.validation_element import ValidationElement
@@ -14,14 +15,17 @@ from psygnal import Signal
 
 from hive_cli import __version__
 from hive_cli.config import load_settings
-from hive_cli.data import ClientState, ComposerFile, HiveData, RepoState
+from hive_cli.data import ClientState, ComposerFile, HiveData, LogDelta, RepoState
 from hive_cli.docker import DockerState
+from hive_cli.logs import LogFeed
+from hive_cli.refresh import REFRESH_INTERVAL, RefreshScheduler
 from hive_cli.styling import (
     DEACTIVATED_STYLE,
     HEADER_STYLE,
     ICO,
     INFO_STYLE,
     LOG_STYLE,
+    METRIC_STYLE,
     PENDING_STYLE,
     SERVICE_ACTIVE_STYLE,
     SIMPLE_STYLE,
@@ -29,10 +33,63 @@ from hive_cli.styling import (
     WARNING_STYLE,
     copy_icon,
     list_files,
+    sparkline,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+LOG_OPTIONS = [10, 20, 50, 100, 200]
+
+
+class LogViewer:
+    """Shows the lines of a `LogFeed` in a `ui.log`.
+
+    Only lines the browser has not received yet are pushed, the browser keeps
+    the last `max_lines` of them. While following is paused no lines are pushed
+    so the view does not scroll; resuming catches up from the last line shown.
+    """
+
+    def __init__(self, feed: LogFeed) -> None:
+        self.feed = feed
+        self.seq = 0
+        self.follow = True
+        self.log: ui.log | None = None
+
+    def build(self, title: str, max_lines: int, on_change: Callable) -> None:
+        def _on_change(evt: ValueChangeEventArguments) -> None:
+            if self.log is not None:
+                # show up to the new number of lines the feed still holds
+                self.log.max_lines = evt.value
+                self.log.clear()
+                self.seq = 0
+                self.refresh()
+            on_change(evt.value)
+
+        with ui.row().classes("flex items-center"):
+            ui.label(title).tailwind(HEADER_STYLE)
+            ui.select(options=LOG_OPTIONS, value=max_lines, on_change=_on_change)
+            ui.label("Einträge").tailwind(HEADER_STYLE)
+            ui.switch("Auto-Scroll").bind_value(self, "follow").on_value_change(
+                self.refresh
+            )
+        self.log = (
+            ui.log(max_lines=max_lines)
+            .classes("grow")
+            .style(LOG_STYLE + " line-break: anywhere;")
+        )
+        self.seq = 0
+        self.refresh()
+
+    def refresh(self) -> None:
+        if self.log is None or not self.follow:
+            return
+        seq, lines, reset = self.feed.since(self.seq)
+        if reset:
+            self.log.clear()
+        for line in lines:
+            self.log.push(line)
+        self.seq = seq
+
 
 class FrontendEvent:
     initialize_repo = Signal()
@@ -81,20 +138,47 @@ class Frontend:
     ) -> None:
         self.app = app
         self.hive = hive
-        self.log_timer = ui.timer(30, self.log_status.refresh, active=False)
+        self.container_log = LogViewer(LogFeed(max(LOG_OPTIONS)))
+        self.client_log = LogViewer(LogFeed(max(LOG_OPTIONS)))
+        self.refresher = RefreshScheduler(self)
+        self.refresh_timer = ui.timer(
+            REFRESH_INTERVAL, self.refresher.flush, active=False
+        )
         self.log_num_entries_cli = 20
         self.log_num_entries_com = 20
         self._recipe_expanded = False
         self._repo_expanded = False
         self._settings_expanded = False
         self.events = FrontendEvent()
-        self.hive.events.recipe.connect(lambda _: self.recipe_status.refresh())
+        self.hive.events.recipe.connect(lambda _: self.refresher.mark("recipe_status"))
         self.hive.events.container_states.connect(
-            lambda _: self.container_status.refresh()
+            lambda _: self.refresher.mark("container_status")
+        )
+        self.hive.events.container_metrics.connect(
+            lambda _: self.refresher.mark("container_status")
         )
         self.hive.events.docker_state.connect(lambda _: self._on_docker_state_change())
+        self.hive.events.service_health.connect(
+            lambda _: self.refresher.mark("available_endpoints")
+        )
+        self.hive.events.pull_progress.connect(
+            lambda _: self.refresher.mark("docker_status")
+        )
+        self.hive.events.image_cache.connect(
+            lambda _: self.refresher.mark("docker_status")
+        )
         self.hive.events.client_state.connect(lambda _: self._on_cli_state_change())
+        self.hive.events.client_checked.connect(lambda _: self._on_cli_state_change())
         self.hive.events.repo_state.connect(lambda _: self._on_repo_state_change())
+        self.hive.events.repo_progress.connect(
+            lambda _: self.refresher.mark("repo_status")
+        )
+        self.hive.events.container_logs_delta.connect(
+            lambda delta: self._on_log_delta("container_log", delta)
+        )
+        self.hive.events.client_logs_delta.connect(
+            lambda delta: self._on_log_delta("client_log", delta)
+        )
 
     def notify(
         self,
@@ -140,6 +224,8 @@ class Frontend:
             )
         elif self.hive.repo_state == RepoState.UPDATING:
             ui.label("Updating").tailwind(PENDING_STYLE)
+            if self.hive.repo_progress:
+                ui.label(self.hive.repo_progress).tailwind(TEXT_INFO_STYLE)
         else:
             ui.label("Aktuell").tailwind(INFO_STYLE)
             ui.button("Check", icon="refresh").on_click(
@@ -232,6 +318,8 @@ class Frontend:
         if self.hive.recipe and self.hive.recipe.endpoints:
             with ui.row():
                 for endpoint in self.hive.recipe.endpoints:
+                    service = self.hive.recipe.endpoint_service(endpoint)
+                    health = self.hive.service_health.get(service or "")
                     button = ui.button(
                         endpoint.name,
                         on_click=partial(
@@ -241,14 +329,32 @@ class Frontend:
                         icon=endpoint.icon,
                     )
                     button.tailwind(SERVICE_ACTIVE_STYLE)
-                    if self.hive.docker_state != DockerState.STARTED:
+                    if self.hive.docker_state != DockerState.STARTED or (
+                        service is not None and not (health and health.healthy)
+                    ):
                         button.disable()
+                    if health is not None:
+                        button.tooltip(
+                            f"{service}: {health.status}"
+                            if health.time_to_healthy is None
+                            else f"{service}: healthy after "
+                            f"{health.time_to_healthy:.1f}s"
+                        )
 
     @ui.refreshable
     def container_status(self) -> None:
         ui.label("Container List").tailwind(HEADER_STYLE)
         states = self.hive.container_states
-        labels = ["State", "Name", "Image", "Status"]
+        labels = [
+            "State",
+            "Name",
+            "Image",
+            "Status",
+            "CPU",
+            "Memory",
+            "Net I/O",
+            "Block I/O",
+        ]
         if states:
             with ui.scroll_area().classes("grow"), ui.grid(columns=len(labels)):
                 for label in labels:
@@ -258,48 +364,38 @@ class Frontend:
                     ui.label(container.name)
                     ui.label(container.image)
                     ui.label(container.status)
+                    metrics = self.hive.container_metrics.get(container.name)
+                    if metrics is None:
+                        for _ in range(4):
+                            ui.label("-").tailwind(TEXT_INFO_STYLE)
+                        continue
+                    ui.label(
+                        f"{metrics.cpu:.1f}% {sparkline(metrics.cpu_history)}"
+                    ).style(METRIC_STYLE)
+                    ui.label(
+                        f"{humanize.naturalsize(metrics.memory, binary=True)} "
+                        f"{sparkline(metrics.memory_history)}"
+                    ).style(METRIC_STYLE)
+                    ui.label(
+                        f"{humanize.naturalsize(metrics.net_rx)} / "
+                        f"{humanize.naturalsize(metrics.net_tx)}"
+                    )
+                    ui.label(
+                        f"{humanize.naturalsize(metrics.blk_read)} / "
+                        f"{humanize.naturalsize(metrics.blk_write)}"
+                    )
         else:
             ui.label("No running container found").tailwind(TEXT_INFO_STYLE)
 
-    @ui.refreshable
     def log_status(self) -> None:
-        with ui.row().classes("flex items-center"):
-            ui.label("Container Log").tailwind(HEADER_STYLE)
-            ui.select(
-                options=[10, 20, 50, 100, 200],
-                value=self.hive.container_logs_num,
-                on_change=lambda evt: self.events.change_num_log_container.emit(
-                    evt.value
-                )
-            )
-            ui.label("Einträge").tailwind(HEADER_STYLE)
-        if self.hive.container_logs:
-            with (
-                ui.scroll_area().classes("grow").style(LOG_STYLE) as scroll,
-                ui.column().style("gap: 0px; line-break: anywhere;"),
-            ):
-                for container_log in self.hive.container_logs:
-                    ui.label(container_log)
-                scroll.scroll_to(percent=100)
-        else:
-            ui.label("No container logs found").tailwind(TEXT_INFO_STYLE)
-        with ui.row().classes("flex items-center"):
-            ui.label("Client Log").tailwind(HEADER_STYLE)
-            ui.select(
-                options=[10, 20, 50, 100, 200],
-                value=self.hive.client_logs_num,
-                on_change=lambda evt: self.events.change_num_log_cli.emit(
-                    evt.value
-                ),
-            )
-            ui.label("Einträge").tailwind(HEADER_STYLE)
-        with (
-            ui.scroll_area().classes("grow").style(LOG_STYLE) as scroll,
-            ui.column().style("gap: 0px; line-break: anywhere;"),
-        ):
-            for log in self.hive.client_logs:
-                ui.label(log)
-            scroll.scroll_to(percent=100)
+        self.container_log.build(
+            "Container Log",
+            self.hive.container_logs_num,
+            self.events.change_num_log_container.emit,
+        )
+        self.client_log.build(
+            "Client Log", self.hive.client_logs_num, self.events.change_num_log_cli.emit
+        )
 
     @ui.refreshable
     def docker_status(self) -> None:
@@ -329,6 +425,34 @@ class Frontend:
             )
         else:
             ui.spinner(size="lg")
+            progress = self.hive.pull_progress
+            if self.hive.docker_state == DockerState.PULLING and progress:
+                with ui.column().classes("gap-0"):
+                    ui.linear_progress(
+                        value=progress.fraction, show_value=False
+                    ).classes("w-64")
+                    eta = (
+                        humanize.naturaldelta(progress.eta)
+                        if progress.eta is not None
+                        else "-"
+                    )
+                    ui.label(
+                        f"{progress.finished}/{progress.images} images, "
+                        f"{humanize.naturalsize(progress.done)} of "
+                        f"{humanize.naturalsize(progress.total)}, "
+                        f"{humanize.naturalsize(progress.throughput)}/s, ETA {eta}"
+                    ).tailwind(TEXT_INFO_STYLE)
+
+        cache = self.hive.image_cache
+        if cache is not None and self.hive.docker_state in [
+            DockerState.STOPPED,
+            DockerState.STARTED,
+        ]:
+            ui.label(
+                f"Images: {humanize.naturalsize(cache.usage)} of "
+                f"{humanize.naturalsize(cache.budget)}, "
+                f"{humanize.naturalsize(cache.reclaimed)} reclaimed"
+            ).tailwind(TEXT_INFO_STYLE)
 
     @ui.refreshable
     def repo_list(self) -> None:
@@ -351,6 +475,10 @@ class Frontend:
     def footer(self) -> None:
         label = ui.label(__version__)
         label.tailwind("text-gray-500 font-semibold")
+        if self.hive.client_checked:
+            label.tooltip(
+                f"Last update check: {self.hive.client_checked:%Y-%m-%d %H:%M}"
+            )
         if self.hive.client_state == ClientState.UPDATE_AVAILABLE:
             icon = ui.icon("cloud_download", size="1.5rem")
             icon.tailwind("text-sky-500 font-semibold cursor-pointer")
@@ -433,19 +561,25 @@ class Frontend:
                 ).bind_enabled_from(ErrorChecker(self.hive, inp_id), "no_errors")
 
     def _on_docker_state_change(self) -> None:
-        self.docker_status.refresh()
-        self.available_endpoints.refresh()
-        self.container_status.refresh()
-        self.recipe_status.refresh()
-        self.settings_form.refresh()
+        self.refresher.mark(
+            "docker_status",
+            "available_endpoints",
+            "container_status",
+            "recipe_status",
+            "settings_form",
+        )
 
     def _on_repo_state_change(self) -> None:
-        self.repo_status.refresh()
-        self.repo_list.refresh()
-        self.recipe_status.refresh()
+        self.refresher.mark("repo_status", "repo_list", "recipe_status")
 
     def _on_cli_state_change(self) -> None:
-        self.footer.refresh()
+        self.refresher.mark("footer")
+
+    def _on_log_delta(
+        self, viewer: Literal["container_log", "client_log"], delta: LogDelta
+    ) -> None:
+        getattr(self, viewer).feed.feed(delta.appended, reset=delta.reset)
+        self.refresher.mark(viewer)
 
     def register_github(self, url: str, token: str) -> ui.dialog:
         with ui.dialog() as dialog, ui.card():
@@ -487,8 +621,8 @@ class Frontend:
             self.container_status()  # type: ignore[call-arg]
 
             # Log
-            self.log_status()  # type: ignore[call-arg]
-            self.log_timer.active = True
+            self.log_status()
+            self.refresh_timer.active = True
 
             # Recipe
             self.recipe_status()  # type: ignore[call-arg]
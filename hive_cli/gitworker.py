@@ -0,0 +1,119 @@
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Timer
+from time import monotonic
+from typing import Any, Callable
+
+from git import RemoteProgress
+
+from hive_cli.data import HiveData, RepoState
+
+_LOGGER = logging.getLogger(__name__)
+
+STAGES = {
+    RemoteProgress.COUNTING: "Counting objects",
+    RemoteProgress.COMPRESSING: "Compressing objects",
+    RemoteProgress.RECEIVING: "Receiving objects",
+    RemoteProgress.RESOLVING: "Resolving deltas",
+    RemoteProgress.WRITING: "Writing objects",
+}
+
+
+class GitProgress(RemoteProgress):
+    """Publishes the progress of a remote operation to `HiveData.repo_progress`."""
+
+    def __init__(self, hive: HiveData) -> None:
+        super().__init__()
+        self.hive = hive
+
+    def update(
+        self,
+        op_code: int,
+        cur_count: str | float,
+        max_count: str | float | None = None,
+        message: str = "",  # noqa: ARG002
+    ) -> None:
+        stage = STAGES.get(op_code & self.OP_MASK)
+        if stage is None:
+            return
+        progress = (
+            f"{stage} {float(cur_count) / float(max_count):.0%}"
+            if max_count
+            else f"{stage} {cur_count}"
+        )
+        # psygnal only emits when the text actually changed
+        self.hive.repo_progress = progress
+
+
+class GitWorker:
+    """Runs repository operations one at a time outside of UI event handlers.
+
+    Every operation returns a future. Callers are synchronous signal handlers
+    which must return at once and report results through `HiveData` or a
+    done callback, so no awaitable variant is needed. Network operations set
+    `RepoState.UPDATING` while they run. An operation exceeding its timeout
+    fails its future; remote git commands themselves are killed after
+    `Settings.git_timeout`.
+    """
+
+    def __init__(self, hive: HiveData, refresh: Callable[[], None]) -> None:
+        self.hive = hive
+        self.refresh = refresh
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="git")
+
+    def submit(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        *args: Any,  # noqa: ANN401
+        timeout: float | None = None,
+        updating: bool = False,
+    ) -> Future:
+        result: Future = Future()
+        self._executor.submit(self._execute, result, name, fn, args, timeout, updating)
+        return result
+
+    def _expire(self, result: Future, name: str, timeout: float) -> None:
+        if not result.done():
+            msg = f"Git operation '{name}' timed out after {timeout}s"
+            _LOGGER.warning(msg)
+            result.set_exception(TimeoutError(msg))
+
+    def _execute(
+        self,
+        result: Future,
+        name: str,
+        fn: Callable[..., Any],
+        args: tuple,
+        timeout: float | None,
+        updating: bool,
+    ) -> None:
+        if not result.set_running_or_notify_cancel():
+            return
+        timer = None
+        if timeout:
+            timer = Timer(timeout, self._expire, (result, name, timeout))
+            timer.daemon = True
+            timer.start()
+        if updating:
+            self.hive.repo_state = RepoState.UPDATING
+        start = monotonic()
+        try:
+            value = fn(*args)
+            if not result.done():
+                result.set_result(value)
+        except Exception as e:
+            _LOGGER.error("Git operation '%s' failed: %s", name, e)
+            if not result.done():
+                result.set_exception(e)
+            if updating:
+                # leave UPDATING for the actual state of the repo
+                self.refresh()
+        finally:
+            if timer is not None:
+                timer.cancel()
+            self.hive.repo_progress = None
+            _LOGGER.debug("Git operation '%s' took %.1fs", name, monotonic() - start)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
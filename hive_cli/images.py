@@ -0,0 +1,141 @@
+import logging
+from datetime import datetime, timezone
+from time import time
+
+import humanize
+from pydantic import BaseModel
+
+from hive_cli import __version__
+from hive_cli.backend import Backend
+from hive_cli.config import IMAGE_CACHE
+from hive_cli.data import HiveData, ImageCacheStats, LocalImage
+from hive_cli.update import CLI_IMAGE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def normalize_reference(reference: str) -> str:
+    """Bring an image reference into the form the engine uses for tags."""
+    for prefix in ["docker.io/library/", "docker.io/"]:
+        if reference.startswith(prefix):
+            reference = reference[len(prefix) :]
+            break
+    if "@" not in reference and ":" not in reference.rsplit("/", 1)[-1]:
+        reference += ":latest"
+    return reference
+
+
+class ImageUsage(BaseModel):
+    last_used: dict[str, float] = {}
+
+    def save(self) -> None:
+        _LOGGER.debug("Saving image usage to %s", IMAGE_CACHE)
+        with IMAGE_CACHE.open("w") as f:
+            f.write(self.model_dump_json(indent=2))
+
+    @classmethod
+    def load(cls) -> "ImageUsage":
+        if IMAGE_CACHE.exists():
+            try:
+                with IMAGE_CACHE.open() as f:
+                    return cls.model_validate_json(f.read())
+            except Exception as e:
+                _LOGGER.warning("Error loading image usage: %s", e)
+        return cls()
+
+
+class ImageCache:
+    """Keeps local images within `Settings.image_budget` bytes.
+
+    Images referenced by the current recipe, the running hive-cli version or
+    any container are kept. All others are evicted least recently used first.
+    Usage is the sum of image sizes, which counts shared layers repeatedly and
+    therefore errs on the side of evicting.
+    """
+
+    def __init__(self, hive: HiveData, backend: Backend) -> None:
+        self.hive = hive
+        self.backend = backend
+        self.usage = ImageUsage.load()
+
+    def referenced(self) -> set[str]:
+        references = [
+            f"{CLI_IMAGE}:latest",
+            f"{CLI_IMAGE}:{__version__}",
+        ]
+        if self.hive.recipe is not None:
+            references.extend(self.hive.recipe.images())
+        return {normalize_reference(reference) for reference in references}
+
+    def _is_referenced(self, image: LocalImage, references: set[str]) -> bool:
+        return any(tag in references for tag in image.tags) or any(
+            digest in references for digest in image.digests
+        )
+
+    def evict(self) -> None:
+        budget = self.hive.settings.image_budget
+        if budget <= 0:
+            return
+        images = self.backend.images()
+        used = self.backend.used_images()
+        references = self.referenced()
+        now = time()
+        for image in images:
+            if image.id in used or self._is_referenced(image, references):
+                self.usage.last_used[image.id] = now
+        # forget images which were removed by other means
+        self.usage.last_used = {
+            image.id: self.usage.last_used[image.id]
+            for image in images
+            if image.id in self.usage.last_used
+        }
+        usage = sum(image.size for image in images)
+        candidates = sorted(
+            (
+                image
+                for image in images
+                if image.id not in used and not self._is_referenced(image, references)
+            ),
+            key=lambda image: self.usage.last_used.get(image.id, image.created),
+        )
+        reclaimed = 0
+        evicted = 0
+        for image in candidates:
+            if usage <= budget:
+                break
+            try:
+                for reference in image.tags or [image.id]:
+                    self.backend.remove_image(reference)
+            except Exception as e:
+                _LOGGER.debug("Cannot remove image %s: %s", image.id[:19], e)
+                continue
+            _LOGGER.debug(
+                "Evicted %s (%s)",
+                image.tags or image.id[:19],
+                humanize.naturalsize(image.size),
+            )
+            self.usage.last_used.pop(image.id, None)
+            usage -= image.size
+            reclaimed += image.size
+            evicted += 1
+        if evicted:
+            _LOGGER.info(
+                "Evicted %d images and reclaimed %s",
+                evicted,
+                humanize.naturalsize(reclaimed),
+            )
+        if usage > budget:
+            _LOGGER.warning(
+                "Images use %s which exceeds the budget of %s",
+                humanize.naturalsize(usage),
+                humanize.naturalsize(budget),
+            )
+        self.usage.save()
+        previous = self.hive.image_cache
+        self.hive.image_cache = ImageCacheStats(
+            usage=usage,
+            budget=budget,
+            reclaimed=reclaimed + (previous.reclaimed if previous else 0),
+            evicted=evicted + (previous.evicted if previous else 0),
+            checked=datetime.now(tz=timezone.utc),
+        )
@@ -0,0 +1,231 @@
+import logging
+from collections import deque
+from concurrent.futures import CancelledError, Future
+from itertools import islice
+from threading import Event, Lock, Thread, Timer, local
+from typing import Callable, Literal
+
+from hive_cli.data import DockerState, HiveData, LogDelta
+from hive_cli.process import ProcessResult
+
+_LOGGER = logging.getLogger(__name__)
+
+PUBLISH_INTERVAL = 0.2
+
+
+class LogBuffer:
+    """Fixed size ring buffer of log lines in append order.
+
+    Every line receives a consecutive sequence number so that readers can
+    request only the lines they have not seen yet.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.seq = 0
+        self._lines: deque[tuple[int, str]] = deque(maxlen=size)
+        self._lock = Lock()
+
+    def append(self, line: str) -> int:
+        with self._lock:
+            self.seq += 1
+            self._lines.append((self.seq, line))
+            return self.seq
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lines.clear()
+
+    def _last(self, num: int) -> list[str]:
+        # walk from the end, readers usually only miss the newest lines
+        lines = [line for _, line in islice(reversed(self._lines), max(num, 0))]
+        lines.reverse()
+        return lines
+
+    def tail(self, num: int) -> list[str]:
+        with self._lock:
+            return self._last(num)
+
+    def since(self, seq: int) -> tuple[int, list[str]]:
+        """Return the current sequence number and all lines newer than `seq`."""
+        with self._lock:
+            # sequence numbers are consecutive, so the count follows directly
+            return self.seq, self._last(self.seq - seq)
+
+
+class LogPublisher:
+    """Publishes lines appended to a `LogBuffer` as `LogDelta`s of `HiveData`.
+
+    Appends are reported with `request`, which publishes all lines added
+    within `PUBLISH_INTERVAL` as one delta.
+    """
+
+    def __init__(
+        self,
+        hive: HiveData,
+        field: Literal["container_logs_delta", "client_logs_delta"],
+        buffer: LogBuffer,
+    ) -> None:
+        self.hive = hive
+        self.field = field
+        self.buffer = buffer
+        self.seq = 0
+        self._lock = Lock()
+        self._pending: Timer | None = None
+
+    def request(self) -> None:
+        with self._lock:
+            if self._pending is not None:
+                return
+            self._pending = Timer(PUBLISH_INTERVAL, self._publish_pending)
+            self._pending.daemon = True
+            self._pending.start()
+
+    def _publish_pending(self) -> None:
+        with self._lock:
+            self._pending = None
+        self.publish()
+
+    def publish(self, reset: bool = False) -> None:
+        """Publish new lines; `reset` replaces everything published so far."""
+        with self._lock:
+            seq, lines = self.buffer.since(self.seq)
+            if not lines and not reset:
+                return
+            self.seq = seq
+            delta = LogDelta(seq=seq, appended=lines, reset=reset)
+            setattr(self.hive, self.field, delta)
+
+
+class LogBufferHandler(logging.Handler):
+    """Keeps formatted records in a `LogBuffer` and reports every append.
+
+    Records of the loggers in `exclude` are dropped.
+    """
+
+    def __init__(self, buffer: LogBuffer, exclude: list[str] | None = None) -> None:
+        super().__init__()
+        self.buffer = buffer
+        self.exclude = exclude or []
+        self.on_append: Callable[[], None] | None = None
+        self._local = local()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.name not in self.exclude and bool(super().filter(record))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.buffer.append(self.format(record))
+            # records logged while reporting are shown with the next append
+            if self.on_append is not None and not getattr(
+                self._local, "reporting", False
+            ):
+                self._local.reporting = True
+                try:
+                    self.on_append()
+                finally:
+                    self._local.reporting = False
+        except Exception:
+            self.handleError(record)
+
+
+class LogFeed:
+    """Append-only window of a published log list for incremental viewers.
+
+    Viewers remember the sequence number of the last line they show and fetch
+    only newer lines. Replacing the list skips a sequence number so that every
+    viewer behind it starts over.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.seq = 0
+        self._reset = 0
+        self._lines: deque[tuple[int, str]] = deque(maxlen=size)
+        self._lock = Lock()
+
+    def feed(self, lines: list[str], reset: bool = False) -> None:
+        with self._lock:
+            if reset:
+                self.seq += 1
+                self._reset = self.seq
+                self._lines.clear()
+            for line in lines:
+                self.seq += 1
+                self._lines.append((self.seq, line))
+
+    def since(self, seq: int) -> tuple[int, list[str], bool]:
+        """Return the current sequence number, the lines newer than `seq` and
+        whether the viewer has to drop what it shows before adding them."""
+        with self._lock:
+            oldest = self._lines[0][0] if self._lines else self.seq + 1
+            if seq < self._reset or seq + 1 < oldest:
+                return self.seq, [line for _, line in self._lines], True
+            return self.seq, [line for s, line in self._lines if s > seq], False
+
+
+class LogFollower:
+    """Follows the logs of the whole stack with one long-lived compose session."""
+
+    def __init__(
+        self, hive: HiveData, stream: Callable[..., Future[ProcessResult] | None]
+    ) -> None:
+        self.hive = hive
+        self.buffer = LogBuffer(hive.settings.log_buffer_size)
+        self.publisher = LogPublisher(hive, "container_logs_delta", self.buffer)
+        self._stream = stream
+        self._session: Future[ProcessResult] | None = None
+        self._stopped = Event()
+        self._runner: Thread | None = None
+
+    @property
+    def active(self) -> bool:
+        return self._runner is not None and self._runner.is_alive()
+
+    def start(self) -> None:
+        if self.active:
+            return
+        self._stopped.clear()
+        self._runner = Thread(target=self._task_follow, daemon=True)
+        self._runner.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._session is not None:
+            self._session.cancel()
+        if self._runner is not None:
+            self._runner.join(timeout=5)
+            self._runner = None
+
+    def _on_line(self, line: str) -> None:
+        self.buffer.append(line)
+        self.publisher.request()
+
+    def _task_follow(self) -> None:
+        while (
+            not self._stopped.is_set()
+            and self.hive.docker_state == DockerState.STARTED
+        ):
+            # the session replays the last lines, start from scratch
+            self.buffer.clear()
+            self.publisher.publish(reset=True)
+            self._session = self._stream(
+                "logs",
+                "--no-color",
+                "-f",
+                "-n",
+                str(self.buffer.size),
+                on_line=self._on_line,
+            )
+            if self._session is None:
+                _LOGGER.warning("Cannot follow container logs")
+            else:
+                _LOGGER.debug("Following container logs")
+                try:
+                    self._session.result()
+                except CancelledError:
+                    pass
+                except Exception as e:
+                    _LOGGER.warning("Container log session failed: %s", e)
+                self._session = None
+            self._stopped.wait(self.hive.settings.log_interval)
+        _LOGGER.debug("Stopped following container logs")
@@ -0,0 +1,154 @@
+import logging
+from array import array
+from threading import Event, Lock, Thread
+from time import monotonic
+
+import docker
+
+from hive_cli.data import ContainerMetrics, ContainerState, HiveData
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RingBuffer:
+    """Fixed-size float history backed by an array."""
+
+    def __init__(self, size: int) -> None:
+        self._values = array("d", [0.0]) * size
+        self._index = 0
+        self._count = 0
+
+    def append(self, value: float) -> None:
+        self._values[self._index] = value
+        self._index = (self._index + 1) % len(self._values)
+        self._count = min(self._count + 1, len(self._values))
+
+    def values(self) -> list[float]:
+        if self._count < len(self._values):
+            return self._values[: self._count].tolist()
+        return (self._values[self._index :] + self._values[: self._index]).tolist()
+
+
+class ContainerStats:
+    """Latest sample and history of a single container's stats stream."""
+
+    def __init__(self, name: str, size: int) -> None:
+        self.name = name
+        self.metrics = ContainerMetrics()
+        self.cpu_history = RingBuffer(size)
+        self.memory_history = RingBuffer(size)
+        self.recorded = 0.0
+        self.stopped = Event()
+
+    def update(self, stats: dict, interval: float) -> None:
+        cpu = stats.get("cpu_stats", {})
+        precpu = stats.get("precpu_stats", {})
+        usage = cpu.get("cpu_usage", {})
+        cpu_delta = usage.get("total_usage", 0) - precpu.get("cpu_usage", {}).get(
+            "total_usage", 0
+        )
+        system_delta = cpu.get("system_cpu_usage", 0) - precpu.get(
+            "system_cpu_usage", 0
+        )
+        online = cpu.get("online_cpus") or len(usage.get("percpu_usage") or [1])
+        memory = stats.get("memory_stats", {})
+        # cgroup v2 reports inactive_file, v1 reports cache
+        memory_stats = memory.get("stats", {})
+        cache = memory_stats.get("inactive_file", memory_stats.get("cache", 0))
+        networks = (stats.get("networks") or {}).values()
+        blkio = stats.get("blkio_stats", {}).get("io_service_bytes_recursive") or []
+        self.metrics = ContainerMetrics(
+            cpu=cpu_delta / system_delta * online * 100 if system_delta > 0 else 0,
+            memory=max(memory.get("usage", 0) - cache, 0),
+            memory_limit=memory.get("limit", 0),
+            net_rx=sum(network.get("rx_bytes", 0) for network in networks),
+            net_tx=sum(network.get("tx_bytes", 0) for network in networks),
+            blk_read=sum(
+                entry["value"] for entry in blkio if entry["op"].lower() == "read"
+            ),
+            blk_write=sum(
+                entry["value"] for entry in blkio if entry["op"].lower() == "write"
+            ),
+        )
+        now = monotonic()
+        if now - self.recorded >= interval:
+            self.recorded = now
+            self.cpu_history.append(self.metrics.cpu)
+            self.memory_history.append(self.metrics.memory)
+
+    def snapshot(self) -> ContainerMetrics:
+        return self.metrics.model_copy(
+            update={
+                "cpu_history": self.cpu_history.values(),
+                "memory_history": self.memory_history.values(),
+            }
+        )
+
+
+class MetricsCollector:
+    """Streams engine stats with one connection per container of the stack.
+
+    Samples are published to `HiveData.container_metrics` at most every
+    `Settings.metrics_interval` seconds.
+    """
+
+    def __init__(self, hive: HiveData, client: docker.DockerClient) -> None:
+        self.hive = hive
+        self.client = client
+        self._stats: dict[str, ContainerStats] = {}
+        self._lock = Lock()
+        self._stopped = Event()
+        self._publisher: Thread | None = None
+
+    def follow(self, containers: list[ContainerState]) -> None:
+        running = {
+            container.id: container.name
+            for container in containers
+            if container.state == "running"
+        }
+        with self._lock:
+            for container_id in set(self._stats) - set(running):
+                self._stats.pop(container_id).stopped.set()
+            for container_id, name in running.items():
+                if container_id not in self._stats:
+                    stats = ContainerStats(name, self.hive.settings.metrics_history)
+                    self._stats[container_id] = stats
+                    Thread(
+                        target=self._task_stream,
+                        args=(container_id, stats),
+                        daemon=True,
+                    ).start()
+        if self._publisher is None or not self._publisher.is_alive():
+            self._stopped.clear()
+            self._publisher = Thread(target=self._task_publish, daemon=True)
+            self._publisher.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        with self._lock:
+            for stats in self._stats.values():
+                stats.stopped.set()
+            self._stats.clear()
+        self.hive.container_metrics = {}
+
+    def _task_stream(self, container_id: str, stats: ContainerStats) -> None:
+        _LOGGER.debug("Streaming stats of %s", stats.name)
+        try:
+            stream = self.client.api.stats(container_id, stream=True, decode=True)
+            for sample in stream:
+                if stats.stopped.is_set():
+                    break
+                stats.update(sample, self.hive.settings.metrics_interval)
+        except Exception as e:
+            _LOGGER.debug("Stats stream of %s ended: %s", stats.name, e)
+        with self._lock:
+            if self._stats.get(container_id) is stats:
+                del self._stats[container_id]
+
+    def _task_publish(self) -> None:
+        while not self._stopped.wait(self.hive.settings.metrics_interval):
+            with self._lock:
+                metrics = {
+                    stats.name: stats.snapshot() for stats in self._stats.values()
+                }
+            self.hive.container_metrics = metrics
@@ -0,0 +1,178 @@
+import enum
+import logging
+from collections import deque
+from threading import Condition, Thread
+from time import monotonic
+from typing import Callable
+
+from hive_cli.data import HiveData, OperationStats
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class OperationKind(enum.Enum):
+    START = enum.auto()
+    STOP = enum.auto()
+    RESTART = enum.auto()
+    PULL = enum.auto()
+    RECONCILE = enum.auto()
+    CHECK_UPDATE = enum.auto()
+    UPDATE_CLI = enum.auto()
+    EVICT_IMAGES = enum.auto()
+
+
+# running these once more does not change the result of an earlier request
+IDEMPOTENT = [
+    OperationKind.CHECK_UPDATE,
+    OperationKind.EVICT_IMAGES,
+    OperationKind.UPDATE_CLI,
+]
+
+
+class Operation:
+    def __init__(
+        self,
+        kind: OperationKind,
+        images: list[str] | None = None,
+        callbacks: list[Callable] | None = None,
+    ) -> None:
+        self.kind = kind
+        self.images = images or []
+        self.callbacks = callbacks or []
+        self.submitted = monotonic()
+
+    def __repr__(self) -> str:
+        return self.kind.name
+
+
+class OperationScheduler:
+    """Runs docker operations one after another on a single worker.
+
+    Idempotent operations merge into any pending operation of the same kind.
+    All others are coalesced with the queue tail: duplicates collapse into
+    one, a queued stop followed by a start becomes a restart, a queued start
+    or restart followed by a stop becomes a stop and queued pulls are merged.
+    """
+
+    def __init__(
+        self, hive: HiveData, handlers: dict[OperationKind, Callable[..., object]]
+    ) -> None:
+        self.hive = hive
+        self.handlers = handlers
+        self.stats = OperationStats()
+        self._queue: deque[Operation] = deque()
+        self._condition = Condition()
+        self._stopped = False
+        self._runner = Thread(target=self._task_work, name="operations", daemon=True)
+        self._runner.start()
+
+    @property
+    def depth(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def _coalesce(self, operation: Operation) -> bool:
+        """Merge `operation` into the queue tail; return whether it was absorbed.
+
+        Only the tail is considered for other kinds so that the last submitted
+        lifecycle operation always decides whether the stack ends up running.
+        """
+        if operation.kind in IDEMPOTENT:
+            for queued in self._queue:
+                if queued.kind == operation.kind:
+                    queued.callbacks.extend(operation.callbacks)
+                    return True
+            return False
+        if not self._queue:
+            return False
+        queued = self._queue[-1]
+        if queued.kind == operation.kind or (
+            queued.kind == OperationKind.RESTART
+            and operation.kind == OperationKind.START
+        ):
+            queued.images.extend(
+                image for image in operation.images if image not in queued.images
+            )
+        elif (
+            queued.kind == OperationKind.STOP and operation.kind == OperationKind.START
+        ):
+            queued.kind = OperationKind.RESTART
+        elif (
+            queued.kind in [OperationKind.START, OperationKind.RESTART]
+            and operation.kind == OperationKind.STOP
+        ):
+            # the stack has not been started yet, stopping is the final intent
+            queued.kind = OperationKind.STOP
+        else:
+            return False
+        queued.callbacks.extend(operation.callbacks)
+        return True
+
+    def submit(
+        self,
+        kind: OperationKind,
+        images: list[str] | None = None,
+        callback: Callable | None = None,
+    ) -> None:
+        operation = Operation(kind, images, [callback] if callback else None)
+        with self._condition:
+            if self._coalesce(operation):
+                _LOGGER.debug("Coalesced %s into queue %s", kind.name, self._queue)
+                self.stats.coalesced += 1
+            else:
+                self._queue.append(operation)
+                self._condition.notify()
+            self.stats.queue_depth = len(self._queue)
+        self._publish()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            dropped = list(self._queue)
+            self._queue.clear()
+            self._condition.notify()
+        for operation in dropped:
+            self._run_callbacks(operation)
+
+    def _run_callbacks(self, operation: Operation) -> None:
+        for callback in operation.callbacks:
+            try:
+                callback()
+            except Exception as e:
+                _LOGGER.error("Callback of operation %s failed: %s", operation, e)
+
+    def _publish(self) -> None:
+        self.hive.operation_stats = self.stats.model_copy(deep=True)
+
+    def _task_work(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                operation = self._queue.popleft()
+                self.stats.queue_depth = len(self._queue)
+            start = monotonic()
+            _LOGGER.debug("Running operation %s", operation)
+            try:
+                if operation.kind == OperationKind.PULL:
+                    self.handlers[operation.kind](operation.images)
+                else:
+                    self.handlers[operation.kind]()
+            except Exception as e:
+                _LOGGER.error("Operation %s failed: %s", operation, e)
+            finally:
+                # callers rely on their callback to continue, even after failures
+                self._run_callbacks(operation)
+            end = monotonic()
+            _LOGGER.info(
+                "Operation %s finished in %.1fs (%.1fs queued)",
+                operation,
+                end - start,
+                start - operation.submitted,
+            )
+            with self._condition:
+                self.stats.latency[operation.kind.name] = end - operation.submitted
+                self.stats.completed += 1
+            self._publish()
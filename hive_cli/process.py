@@ -0,0 +1,160 @@
+import asyncio
+import logging
+from concurrent.futures import Future
+from pathlib import Path
+from threading import Lock, Thread
+from time import monotonic
+from typing import AsyncIterator, Callable
+
+from pydantic import BaseModel
+
+from hive_cli.config import load_settings
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30
+CHUNK_SIZE = 64 * 1024
+MAX_LINE = 1024 * 1024
+
+
+async def read_lines(stream: asyncio.StreamReader) -> AsyncIterator[str]:
+    """Decoded lines of `stream`; lines longer than `MAX_LINE` are split."""
+    pending = b""
+    while chunk := await stream.read(CHUNK_SIZE):
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        while len(pending) > MAX_LINE:
+            lines.append(pending[:MAX_LINE])
+            pending = pending[MAX_LINE:]
+        for line in lines:
+            for start in range(0, max(len(line), 1), MAX_LINE):
+                yield line[start : start + MAX_LINE].decode(
+                    "utf-8", errors="replace"
+                ).rstrip()
+    if pending:
+        yield pending.decode("utf-8", errors="replace").rstrip()
+
+
+class ProcessResult(BaseModel):
+    cmd: list[str]
+    returncode: int
+    output: list[str] = []
+    duration: float
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def check(self) -> "ProcessResult":
+        if not self.ok:
+            reason = "timed out" if self.timed_out else f"exit code {self.returncode}"
+            detail = self.output[-1] if self.output else ""
+            msg = f"'{' '.join(self.cmd)}' failed ({reason}) {detail}".strip()
+            raise RuntimeError(msg)
+        return self
+
+
+class ProcessSupervisor:
+    """Runs docker and git commands on a dedicated asyncio loop.
+
+    The number of concurrent processes is bounded, every command has a
+    deadline and processes are always killed and reaped when they time out
+    or their future is cancelled.
+    """
+
+    def __init__(self, max_processes: int) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(max_processes)
+        self._runner = Thread(
+            target=self._loop.run_forever, name="supervisor", daemon=True
+        )
+        self._runner.start()
+
+    async def _run(
+        self,
+        cmd: list[str],
+        cwd: Path | None,
+        env: dict[str, str] | None,
+        timeout: float | None,
+        on_line: Callable[[str], None] | None,
+    ) -> ProcessResult:
+        async with self._semaphore:
+            _LOGGER.debug("Running command: %s", " ".join(cmd))
+            start = monotonic()
+            output: list[str] = []
+            timed_out = False
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                cwd=cwd,
+                env=env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+            try:
+                async with asyncio.timeout(timeout):
+                    lines = read_lines(process.stdout)  # type: ignore[arg-type]
+                    async for line in lines:
+                        if on_line is None:
+                            _LOGGER.debug(line)
+                            output.append(line)
+                        else:
+                            on_line(line)
+                    await process.wait()
+            except TimeoutError:
+                _LOGGER.warning("'%s' timed out after %ss", " ".join(cmd), timeout)
+                timed_out = True
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+            return ProcessResult(
+                cmd=cmd,
+                returncode=-1 if process.returncode is None else process.returncode,
+                output=output,
+                duration=monotonic() - start,
+                timed_out=timed_out,
+            )
+
+    def submit(
+        self,
+        cmd: list[str],
+        cwd: Path | None = None,
+        env: dict[str, str] | None = None,
+        timeout: float | None = DEFAULT_TIMEOUT,
+        on_line: Callable[[str], None] | None = None,
+    ) -> Future[ProcessResult]:
+        """Start a command; cancelling the future kills the process.
+
+        Output lines are passed to `on_line` or logged and collected otherwise.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._run(cmd, cwd, env, timeout, on_line), self._loop
+        )
+
+    def run(
+        self,
+        cmd: list[str],
+        cwd: Path | None = None,
+        env: dict[str, str] | None = None,
+        timeout: float | None = DEFAULT_TIMEOUT,
+        on_line: Callable[[str], None] | None = None,
+    ) -> ProcessResult:
+        future = self.submit(cmd, cwd, env, timeout, on_line)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+
+class _Instance:
+    supervisor: ProcessSupervisor | None = None
+    lock = Lock()
+
+
+def get_supervisor() -> ProcessSupervisor:
+    with _Instance.lock:
+        if _Instance.supervisor is None:
+            _Instance.supervisor = ProcessSupervisor(load_settings().process_limit)
+        return _Instance.supervisor
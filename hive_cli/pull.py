@@ -0,0 +1,196 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from time import monotonic, time
+
+from pydantic import BaseModel
+
+from hive_cli.backend import Backend
+from hive_cli.config import DIGEST_CACHE
+from hive_cli.data import HiveData, PullProgress
+
+_LOGGER = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = 0.5
+
+
+class PullResult(BaseModel):
+    image: str
+    duration: float
+    skipped: bool = False
+    error: str | None = None
+
+
+class DigestEntry(BaseModel):
+    digest: str
+    checked: float
+
+
+class DigestCache(BaseModel):
+    entries: dict[str, DigestEntry] = {}
+
+    def save(self) -> None:
+        _LOGGER.debug("Saving digest cache to %s", DIGEST_CACHE)
+        with DIGEST_CACHE.open("w") as f:
+            f.write(self.model_dump_json(indent=2))
+
+    @classmethod
+    def load(cls) -> "DigestCache":
+        if DIGEST_CACHE.exists():
+            try:
+                with DIGEST_CACHE.open() as f:
+                    return cls.model_validate_json(f.read())
+            except Exception as e:
+                _LOGGER.warning("Error loading digest cache: %s", e)
+        return cls()
+
+
+class ProgressAggregator:
+    """Sums the per-layer progress messages of concurrent pulls.
+
+    Updates are published to `HiveData.pull_progress` at most every
+    `PROGRESS_INTERVAL` seconds.
+    """
+
+    def __init__(self, hive: HiveData, images: int) -> None:
+        self.hive = hive
+        self.images = images
+        self.finished = 0
+        self._layers: dict[tuple[str, str], tuple[int, int]] = {}
+        self._lock = Lock()
+        self._start = monotonic()
+        self._published = 0.0
+
+    def update(self, image: str, event: dict) -> None:
+        key = (image, event.get("id", ""))
+        status = event.get("status", "")
+        detail = event.get("progressDetail") or {}
+        with self._lock:
+            if status == "Downloading" and detail.get("total"):
+                self._layers[key] = (detail.get("current", 0), detail["total"])
+            elif status in ["Download complete", "Pull complete"]:
+                if key not in self._layers:
+                    return
+                total = self._layers[key][1]
+                self._layers[key] = (total, total)
+            else:
+                return
+            now = monotonic()
+            if now - self._published < PROGRESS_INTERVAL:
+                return
+            self._published = now
+        self.hive.pull_progress = self.snapshot()
+
+    def finish(self) -> None:
+        with self._lock:
+            self.finished += 1
+        self.hive.pull_progress = self.snapshot()
+
+    def snapshot(self) -> PullProgress:
+        with self._lock:
+            done = sum(current for current, _ in self._layers.values())
+            total = sum(total for _, total in self._layers.values())
+        elapsed = monotonic() - self._start
+        throughput = done / elapsed if elapsed > 0 else 0
+        return PullProgress(
+            images=self.images,
+            finished=self.finished,
+            done=done,
+            total=total,
+            throughput=throughput,
+            eta=(total - done) / throughput if throughput > 0 else None,
+        )
+
+
+class ImagePuller:
+    """Pulls a set of images concurrently with a bounded number of workers.
+
+    Images whose local repo digest matches the registry are skipped. Registry
+    lookups are cached for `Settings.digest_ttl` seconds.
+    """
+
+    def __init__(self, hive: HiveData, backend: Backend) -> None:
+        self.hive = hive
+        self.backend = backend
+        self.cache = DigestCache.load()
+        self._lock = Lock()
+
+    def pull(self, images: list[str]) -> list[PullResult]:
+        images = list(dict.fromkeys(images))
+        if not images:
+            return []
+        workers = max(1, min(self.hive.settings.pull_workers, len(images)))
+        _LOGGER.info("Pulling %d images with %d workers", len(images), workers)
+        start = monotonic()
+        progress = ProgressAggregator(self.hive, len(images))
+        self.hive.pull_progress = progress.snapshot()
+        with ThreadPoolExecutor(workers, thread_name_prefix="pull") as pool:
+            results = list(pool.map(partial(self._pull, progress=progress), images))
+        self.hive.pull_progress = None
+        self.cache.save()
+        failed = [result for result in results if result.error is not None]
+        _LOGGER.info(
+            "Pulled %d images in %.1fs (%d skipped, %d failed)",
+            len(results) - len(failed),
+            monotonic() - start,
+            sum(1 for result in results if result.skipped),
+            len(failed),
+        )
+        for result in failed:
+            _LOGGER.warning("Pulling %s failed: %s", result.image, result.error)
+        return results
+
+    @property
+    def environment(self) -> dict[str, str]:
+        return self.hive.recipe.environment if self.hive.recipe else {}
+
+    def remote_digest(self, image: str) -> str | None:
+        """Resolve the manifest digest without downloading the image."""
+        try:
+            digest = self.backend.remote_digest(image, self.environment)
+        except Exception as e:
+            _LOGGER.debug("Cannot resolve digest of %s: %s", image, e)
+            return None
+        if digest is not None:
+            with self._lock:
+                self.cache.entries[image] = DigestEntry(digest=digest, checked=time())
+        return digest
+
+    def is_current(self, image: str) -> tuple[bool, str | None]:
+        if not self.backend.resolves_digests:
+            return False, None
+        try:
+            local = self.backend.local_digests(image)
+        except Exception as e:
+            _LOGGER.debug("Cannot inspect %s: %s", image, e)
+            return False, None
+        if not local:
+            return False, None
+        with self._lock:
+            entry = self.cache.entries.get(image)
+        if (
+            entry is not None
+            and entry.digest in local
+            and time() - entry.checked < self.hive.settings.digest_ttl
+        ):
+            return True, entry.digest
+        remote = self.remote_digest(image)
+        return remote in local, remote
+
+    def _pull(self, image: str, progress: ProgressAggregator) -> PullResult:
+        start = monotonic()
+        current, digest = self.is_current(image)
+        if current:
+            _LOGGER.info("Image %s is up to date (%s)", image, digest)
+            progress.finish()
+            return PullResult(image=image, duration=monotonic() - start, skipped=True)
+        try:
+            self.backend.pull(image, self.environment, partial(progress.update, image))
+        except Exception as e:
+            result = PullResult(image=image, duration=monotonic() - start, error=str(e))
+        else:
+            result = PullResult(image=image, duration=monotonic() - start)
+            _LOGGER.info("Pulled %s in %.1fs", image, result.duration)
+        progress.finish()
+        return result
@@ -0,0 +1,66 @@
+import logging
+
+from hive_cli.data import ComposePlan, ComposerService
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def plan_services(plan: ComposePlan) -> dict[str, ComposerService]:
+    """Services of all compose files; later files replace earlier definitions."""
+    services: dict[str, ComposerService] = {}
+    for compose in plan.files.values():
+        if compose is not None:
+            services.update(compose.services)
+    return services
+
+
+def dependents(services: dict[str, ComposerService], names: set[str]) -> set[str]:
+    """Services which depend on one of `names`, directly or transitively."""
+    result: set[str] = set()
+    pending = set(names)
+    while pending:
+        name = pending.pop()
+        for service_name, service in services.items():
+            if (
+                service_name not in result
+                and name in (service.depends_on or [])
+                and service_name not in names
+            ):
+                result.add(service_name)
+                pending.add(service_name)
+    return result
+
+
+class StackDiff:
+    """Services that have to be recreated or removed to move between plans."""
+
+    def __init__(self, old: ComposePlan, new: ComposePlan) -> None:
+        old_services = plan_services(old)
+        new_services = plan_services(new)
+        self.changed = {
+            name
+            for name, service in new_services.items()
+            if old_services.get(name) != service
+        }
+        self.removed = set(old_services) - set(new_services)
+        self.dependents = dependents(new_services, self.changed)
+        self.images = [
+            service.image
+            for name, service in new_services.items()
+            if name in self.changed and service.image
+        ]
+
+    @property
+    def recreate(self) -> set[str]:
+        return self.changed | self.dependents
+
+    @property
+    def empty(self) -> bool:
+        return not self.changed and not self.removed
+
+    def __str__(self) -> str:
+        return (
+            f"changed: {sorted(self.changed) or '-'}, "
+            f"dependents: {sorted(self.dependents) or '-'}, "
+            f"removed: {sorted(self.removed) or '-'}"
+        )
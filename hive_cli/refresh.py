@@ -0,0 +1,47 @@
+import logging
+from threading import Lock
+
+_LOGGER = logging.getLogger(__name__)
+
+# refreshing the client log must not cause records that refresh it again
+UNBUFFERED_LOGGERS = [__name__]
+
+REFRESH_INTERVAL = 0.2
+
+
+class RefreshScheduler:
+    """Batches refreshes of the `ui.refreshable` components of `owner`.
+
+    Components are marked dirty by name from any thread and rebuilt at most
+    once per `flush`, which runs on the NiceGUI event loop.
+    """
+
+    def __init__(self, owner: object) -> None:
+        self.owner = owner
+        self.requested = 0
+        self.refreshed = 0
+        self._dirty: dict[str, None] = {}
+        self._lock = Lock()
+
+    @property
+    def saved(self) -> int:
+        return self.requested - self.refreshed
+
+    def mark(self, *components: str) -> None:
+        with self._lock:
+            self.requested += len(components)
+            self._dirty.update(dict.fromkeys(components))
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            dirty = list(self._dirty)
+            self._dirty.clear()
+        for component in dirty:
+            try:
+                getattr(self.owner, component).refresh()
+            except Exception as e:
+                _LOGGER.warning("Cannot refresh %s: %s", component, e)
+        with self._lock:
+            self.refreshed += len(dirty)
@@ -0,0 +1,74 @@
+import logging
+import re
+from time import time
+
+import requests
+
+_LOGGER = logging.getLogger(__name__)
+
+TIMEOUT = 5
+MANIFEST_TYPES = ", ".join(
+    [
+        "application/vnd.oci.image.index.v1+json",
+        "application/vnd.docker.distribution.manifest.list.v2+json",
+        "application/vnd.oci.image.manifest.v1+json",
+        "application/vnd.docker.distribution.manifest.v2+json",
+    ]
+)
+
+
+class RegistryClient:
+    """Resolves manifest digests with HEAD requests against a registry's v2 API.
+
+    Only anonymous pull tokens are supported.
+    """
+
+    def __init__(self, image: str) -> None:
+        self.host, _, self.repository = image.partition("/")
+        self._token: str | None = None
+        self._token_expires = 0.0
+
+    def _authenticate(self, challenge: str) -> None:
+        params = dict(re.findall(r'(\w+)="([^"]*)"', challenge))
+        realm = params.pop("realm", None)
+        if realm is None:
+            msg = f"Unsupported authentication challenge: {challenge}"
+            raise ValueError(msg)
+        res = requests.get(realm, params=params, timeout=TIMEOUT)
+        res.raise_for_status()
+        data = res.json()
+        self._token = data.get("token") or data.get("access_token")
+        self._token_expires = time() + data.get("expires_in", 60)
+
+    def _head(self, reference: str, etag: str | None) -> requests.Response:
+        headers = {"Accept": MANIFEST_TYPES}
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        if self._token is not None and time() < self._token_expires:
+            headers["Authorization"] = f"Bearer {self._token}"
+        return requests.head(
+            f"https://{self.host}/v2/{self.repository}/manifests/{reference}",
+            headers=headers,
+            timeout=TIMEOUT,
+        )
+
+    def manifest_digest(
+        self, reference: str, etag: str | None = None
+    ) -> tuple[str | None, str | None]:
+        """Return digest and ETag of a manifest.
+
+        The digest is `None` if the manifest matches the passed ETag.
+        """
+        res = self._head(reference, etag)
+        if res.status_code == 401 and "WWW-Authenticate" in res.headers:
+            self._authenticate(res.headers["WWW-Authenticate"])
+            res = self._head(reference, etag)
+        if res.status_code == 304:
+            return None, etag
+        res.raise_for_status()
+        digest = res.headers.get("Docker-Content-Digest")
+        if digest is None:
+            msg = f"Registry returned no digest for {self.repository}:{reference}"
+            raise ValueError(msg)
+        _LOGGER.debug("%s:%s resolved to %s", self.repository, reference, digest)
+        return digest, res.headers.get("ETag")
@@ -1,16 +1,33 @@
 import logging
 import os
-import subprocess
+from concurrent.futures import Future
 from datetime import datetime
 from pathlib import Path
+from threading import Lock, Timer
+from time import monotonic
 
-from git import Remote, Repo
+from git import GitCommandError, Remote, Repo
 from pydantic import SecretStr
 
-from hive_cli.data import HiveData, RepoState
+from hive_cli import serialize
+from hive_cli.data import HiveData, Recipe, RepoState
+from hive_cli.gitworker import GitProgress, GitWorker
+from hive_cli.process import get_supervisor
+from hive_cli.watcher import RepoWatcher
 
 _LOGGER = logging.getLogger(__name__)
 
+CHANGE_DEBOUNCE = 1.0
+
+
+def ref_sha(lines: list[str], ref: str) -> str | None:
+    """Commit of `ref` in the output of `git ls-remote`."""
+    for line in lines:
+        sha, _, name = line.partition("\t")
+        if name.strip() == ref:
+            return sha.strip()
+    return None
+
 
 class RepoController:
     def __init__(self, hive: HiveData) -> None:
@@ -18,22 +35,117 @@ class RepoController:
             Repo(hive.settings.hive_repo) if hive.settings.hive_repo.exists() else None
         )
         self.hive = hive
+        self._fetched: float | None = None
+        self._fetching: Future[None] | None = None
+        self._fetch_lock = Lock()
+        self._sparse: list[str] | None = None
+        self._changes: set[str] = set()
+        self._changes_lock = Lock()
+        self._dirty = False
+        self._verified: float | None = None
+        self._debounce: Timer | None = None
+        self.worker = GitWorker(hive, lambda: self.update_state(fetch=False))
+        self.watcher = RepoWatcher(hive.settings.hive_repo, self._on_change)
+        self.hive.events.recipe.connect(self._on_recipe)
+        if self.repo:
+            self.watcher.start()
         self.update_state()
 
     def init_repo(self) -> None:
         repo_path = self.hive.settings.hive_repo
         repo_url = self.hive.settings.hive_url
+        if self.hive.settings.clone_mode == "sparse":
+            self._clone_sparse(repo_url, repo_path)
+            self.watcher.start()
+            self.update_state()
+            return
         _LOGGER.debug("Cloning %s to %s", repo_url, repo_path)
         repo_path.mkdir()
         self.repo = Repo.init(repo_path)
         origin = self.repo.create_remote("origin", repo_url)
-        origin.fetch()
+        origin.fetch(**self._remote_options())
         self.repo.create_head("main", origin.refs.main).set_tracking_branch(
             origin.refs.main
         ).checkout()
-        origin.pull()
+        origin.pull(**self._remote_options())
+        self.watcher.start()
         self.update_state()
 
+    def _remote_options(self) -> dict:
+        return {
+            "progress": GitProgress(self.hive),
+            "kill_after_timeout": self.hive.settings.git_timeout,
+        }
+
+    def _clone_sparse(self, repo_url: str, repo_path: Path) -> None:
+        """Clone only the latest commit and check out only this hive's files.
+
+        Blobs are fetched lazily, so other hives' recipes are never downloaded.
+        """
+        _LOGGER.debug("Cloning %s to %s (sparse)", repo_url, repo_path)
+        cmd = [
+            "git",
+            "clone",
+            "--depth",
+            "1",
+            "--filter=blob:none",
+            "--sparse",
+            "--branch",
+            "main",
+            repo_url,
+            repo_path.as_posix(),
+        ]
+        get_supervisor().run(cmd, timeout=self.hive.settings.command_timeout).check()
+        self.repo = Repo(repo_path)
+        recipe = self.remote_file(self.recipe_name)
+        compose = (serialize.load(recipe) or {}).get("compose", []) if recipe else []
+        self.update_sparse(compose)
+
+    @property
+    def recipe_name(self) -> str:
+        return f"{self.hive.settings.hive_id}.yml"
+
+    @property
+    def sparse(self) -> bool:
+        if not self.repo:
+            return False
+        with self.repo.config_reader() as config:
+            return bool(config.get_value("core", "sparseCheckout", False))
+
+    def update_sparse(self, compose: list[str]) -> None:
+        """Limit the working tree to the recipe and its compose files."""
+        patterns = [
+            f"/{self.recipe_name}",
+            # absolute paths are not part of the repo
+            *(f"/{path}" for path in compose if not path.startswith("/")),
+        ]
+        if patterns == self._sparse:
+            return
+        _LOGGER.debug("Setting sparse checkout to %s", patterns)
+        cmd = [
+            "git",
+            "-C",
+            self.hive.settings.hive_repo.as_posix(),
+            "sparse-checkout",
+            "set",
+            "--no-cone",
+            *patterns,
+        ]
+        get_supervisor().run(cmd).check()
+        self._sparse = patterns
+
+    def _on_recipe(self, recipe: Recipe | None) -> None:
+        if recipe is not None:
+            self.worker.submit("sparse checkout", self._apply_sparse, recipe)
+
+    def _apply_sparse(self, recipe: Recipe) -> None:
+        if not self.sparse:
+            return
+        try:
+            self.update_sparse(recipe.compose)
+        except Exception as e:
+            _LOGGER.warning("Cannot update sparse checkout: %s", e)
+
     def update_repo(self) -> None:
         if not self.repo:
             _LOGGER.error("No repo found at %s", self.hive.settings.hive_repo)
@@ -41,9 +153,10 @@ class RepoController:
             return None
         self.reset_repo()
         self.hive.repo_state = RepoState.UPDATING
-        self.repo.remote("origin").fetch()
-        self.repo.remote("origin").pull()
+        self.fetch(force=True)
+        self.repo.remote("origin").pull(**self._remote_options())
         self.repo.heads.main.checkout()
+        self.invalidate()
 
     def remote_changes(self, file_path: Path) -> bool:
         cmd = [
@@ -57,8 +170,16 @@ class RepoController:
             "--",
             file_path.as_posix(),
         ]
-        _LOGGER.debug("Running command %s", " ".join(cmd))
-        return subprocess.call(cmd) != 0
+        return get_supervisor().run(cmd).returncode != 0
+
+    def remote_file(self, path: str) -> str | None:
+        """Content of `path` on origin/main or None if it does not exist there."""
+        if not self.repo:
+            return None
+        try:
+            return self.repo.git.show(f"origin/main:{path}")
+        except GitCommandError:
+            return None
 
     def reset_repo(self) -> None:
         if not self.repo:
@@ -70,7 +191,8 @@ class RepoController:
             (self.hive.settings.hive_repo / untracked).unlink()
         self.repo.head.reset(index=True, working_tree=True)
         self.repo.heads.main.checkout()
-        self.update_state()
+        self.invalidate()
+        self.update_state(fetch=False)
 
     def commit_changes(self) -> None:
         if not self.repo:
@@ -92,26 +214,143 @@ class RepoController:
         with TokenizedRemote(origin, self.hive.settings.github_token) as tokenized:
             _LOGGER.debug("Pushing changes to remote")
             tokenized.push(branch_name, kill_after_timeout=2.0)
-        self.update_state()
+        self.invalidate()
+        self.update_state(fetch=False)
 
-    def update_state(self) -> None:
+    def remote_head(self) -> str | None:
+        """SHA of main on the remote from a ref advertisement or None on failure."""
+        cmd = [
+            "git",
+            "-C",
+            self.hive.settings.hive_repo.as_posix(),
+            "ls-remote",
+            "origin",
+            "refs/heads/main",
+        ]
+        res = get_supervisor().run(cmd)
+        if not res.ok:
+            _LOGGER.debug("Cannot list remote refs: %s", res.output)
+            return None
+        return ref_sha(res.output, "refs/heads/main")
+
+    def _remote_unchanged(self) -> bool:
+        if not self.repo:
+            return False
+        try:
+            local = self.repo.remote("origin").refs.main.commit.hexsha
+        except (AttributeError, IndexError, ValueError):
+            return False
+        return self.remote_head() == local
+
+    def fetch(self, force: bool = False) -> None:
+        """Fetch origin unless the last fetch is younger than `fetch_min_age`.
+
+        Unless forced, the remote's main ref is probed first and the fetch is
+        skipped if it matches origin/main. Concurrent callers wait for and
+        share a single fetch.
+        """
+        if not self.repo:
+            return
+        with self._fetch_lock:
+            future = self._fetching
+            if future is None:
+                if (
+                    not force
+                    and self._fetched is not None
+                    and monotonic() - self._fetched < self.hive.settings.fetch_min_age
+                ):
+                    return
+                self._fetching = Future()
+        if future is not None:
+            _LOGGER.debug("Waiting for fetch in flight")
+            future.result()
+            return
+        try:
+            if not force and self._remote_unchanged():
+                _LOGGER.debug("origin/main is up to date, skipping fetch")
+            else:
+                _LOGGER.debug("Fetching origin from %s", self.hive.settings.hive_url)
+                self.repo.remote("origin").fetch(**self._remote_options())
+            self._fetched = monotonic()
+            self._fetching.set_result(None)  # type: ignore[union-attr]
+        except Exception as e:
+            self._fetching.set_exception(e)  # type: ignore[union-attr]
+            raise
+        finally:
+            with self._fetch_lock:
+                self._fetching = None
+
+    def shutdown(self) -> None:
+        if self._debounce is not None:
+            self._debounce.cancel()
+        self.watcher.stop()
+        self.worker.shutdown()
+
+    def invalidate(self) -> None:
+        """Verify the working tree with `git status` on the next check.
+
+        `.git` is not watched, so changes of hive-cli's own git operations
+        must not rely on watcher events.
+        """
+        with self._changes_lock:
+            self._verified = None
+
+    def _on_change(self, path: str | None) -> None:
+        with self._changes_lock:
+            if path is None:
+                self._verified = None
+            else:
+                self._changes.add(path)
+        # bursts of changes, e.g. from an editor or git itself, cause one update
+        if self._debounce is not None:
+            self._debounce.cancel()
+        self._debounce = Timer(CHANGE_DEBOUNCE, self._on_changes_settled)
+        self._debounce.daemon = True
+        self._debounce.start()
+
+    def _on_changes_settled(self) -> None:
+        # updates report their own state once they are done
+        if self.hive.repo_state != RepoState.UPDATING:
+            self.worker.submit("refresh state", self.update_state, False)
+
+    def is_dirty(self) -> bool:
+        """Whether the working tree has changes or untracked files.
+
+        While the watcher runs, `git status` only runs after files changed or
+        when the last verification is older than `status_verify_interval`.
+        """
+        if not self.repo:
+            return False
+        with self._changes_lock:
+            verify = (
+                not self.watcher.active
+                or bool(self._changes)
+                or self._verified is None
+                or monotonic() - self._verified
+                > self.hive.settings.status_verify_interval
+            )
+            self._changes.clear()
+        if verify:
+            self._dirty = self.repo.is_dirty(untracked_files=True)
+            self._verified = monotonic()
+        return self._dirty
+
+    def update_state(self, fetch: bool = True) -> None:
+        """Derive the repo state; `fetch=False` only looks at the local clone."""
         if not self.repo:
             self.hive.repo_state = RepoState.NOT_FOUND
             return None
 
-        _LOGGER.debug("Fetching origin from %s", self.hive.settings.hive_url)
-        self.repo.remote("origin").fetch()
+        if fetch:
+            self.fetch()
 
         if self.repo.active_branch.name != "main":
             self.hive.repo_state = RepoState.CHANGES_COMMITTED
-        elif datetime.fromtimestamp(
-            self.repo.head.commit.committed_date
-        ) < datetime.fromtimestamp(self.repo.remote().refs.main.commit.committed_date):
-            self.hive.repo_state = RepoState.UPDATE_AVAILABLE
-        elif (
-            self.repo.is_dirty()
-            or len(self.repo.untracked_files) > 0
+        elif not self.repo.is_ancestor(
+            self.repo.remote("origin").refs.main.commit, self.repo.head.commit
         ):
+            self.hive.repo_state = RepoState.UPDATE_AVAILABLE
+        elif self.is_dirty():
             self.hive.repo_state = RepoState.CHANGED_LOCALLY
         else:
             self.hive.repo_state = RepoState.UP_TO_DATE
@@ -0,0 +1,23 @@
+from typing import IO, Any
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+
+    LIBYAML = True
+except ImportError:  # PyYAML was built without libyaml
+    from yaml import SafeDumper, SafeLoader  # type: ignore[assignment]
+
+    LIBYAML = False
+
+
+def load(stream: str | IO[str]) -> Any:  # noqa: ANN401
+    """Parse a YAML document with libyaml if available."""
+    return yaml.load(stream, Loader=SafeLoader)  # noqa: S506
+
+
+def dump(obj: Any) -> str:  # noqa: ANN401
+    """Serialize plain data to YAML with libyaml if available."""
+    return yaml.dump(obj, Dumper=SafeDumper)
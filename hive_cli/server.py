@@ -12,6 +12,8 @@ from hive_cli.controller import Controller
 from hive_cli.data import HiveData
 from hive_cli.frontend import Frontend
 from hive_cli.infopage import InfoPage
+from hive_cli.logs import LogBuffer, LogBufferHandler
+from hive_cli.refresh import UNBUFFERED_LOGGERS
 from hive_cli.ssl import get_sha256_fingerprint
 
 _LOGGER = logging.getLogger(__name__)
@@ -38,7 +40,9 @@ def setup_logging() -> None:
             settings.log_path, encoding="utf-8", maxBytes=1048576, backupCount=10
         )
         file_handler.setFormatter(log_formatter)
-        buffer_handler = logging.handlers.MemoryHandler(capacity=500)
+        buffer_handler = LogBufferHandler(
+            LogBuffer(size=500), exclude=UNBUFFERED_LOGGERS
+        )
         buffer_handler.setFormatter(log_formatter)
         logger.addHandler(file_handler)
         logger.addHandler(buffer_handler)
@@ -0,0 +1,127 @@
+import logging
+from threading import Event, Lock, Thread, Timer
+from time import monotonic
+from typing import Callable
+
+from hive_cli.data import ContainerState, HiveData, ServiceHealth
+
+_LOGGER = logging.getLogger(__name__)
+
+POLL_INTERVAL = 2.0
+
+
+def service_status(states: list[ContainerState]) -> str:
+    """Combined status of all containers of a service.
+
+    Running containers without a health check count as healthy.
+    """
+    for state in states:
+        if state.state != "running":
+            return state.state
+        if state.health not in ["", "healthy"]:
+            return state.health
+    return "healthy"
+
+
+class StartupTracker:
+    """Measures how long every (re)started service takes to become healthy.
+
+    The health of all services is published to `HiveData.service_health`.
+    Services that are not healthy within `Settings.startup_timeout` are
+    marked as timed out. While services are pending `poll` is called every
+    `POLL_INTERVAL` seconds to refresh the container states.
+    """
+
+    def __init__(self, hive: HiveData, poll: Callable[[], None]) -> None:
+        self.hive = hive
+        self.poll = poll
+        self._pending: dict[str, float] = {}
+        self._lock = Lock()
+        self._timer: Timer | None = None
+        self._poller: Thread | None = None
+        self._stopped = Event()
+        self.hive.events.container_states.connect(self._on_states)
+
+    def begin(self, services: list[str], started: float) -> None:
+        """Wait for `services` which were (re)started at monotonic time `started`."""
+        with self._lock:
+            for service in services:
+                self._pending[service] = started
+            self._update({service: ServiceHealth() for service in services})
+        if self._timer is not None:
+            self._timer.cancel()
+        remaining = started + self.hive.settings.startup_timeout - monotonic()
+        self._timer = Timer(max(remaining, 0), self._on_deadline)
+        self._timer.daemon = True
+        self._timer.start()
+        self._on_states(self.hive.container_states)
+        self._stopped.clear()
+        if self._pending and (self._poller is None or not self._poller.is_alive()):
+            self._poller = Thread(target=self._task_poll, daemon=True)
+            self._poller.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        with self._lock:
+            self._pending.clear()
+
+    def _update(self, changes: dict[str, ServiceHealth]) -> None:
+        health = self.hive.service_health | changes
+        if health != self.hive.service_health:
+            self.hive.service_health = health
+
+    def _on_states(self, states: list[ContainerState]) -> None:
+        services: dict[str, list[ContainerState]] = {}
+        for state in states:
+            services.setdefault(state.service, []).append(state)
+        now = monotonic()
+        with self._lock:
+            health: dict[str, ServiceHealth] = {}
+            for service, service_states in services.items():
+                status = service_status(service_states)
+                current = self.hive.service_health.get(service, ServiceHealth())
+                if status == "healthy" and service in self._pending:
+                    elapsed = now - self._pending.pop(service)
+                    _LOGGER.info("Service %s healthy after %.1fs", service, elapsed)
+                    health[service] = ServiceHealth(
+                        status=status, time_to_healthy=elapsed
+                    )
+                elif current.status != "timeout" or status == "healthy":
+                    health[service] = current.model_copy(update={"status": status})
+                else:
+                    health[service] = current
+            for service in self._pending:
+                health.setdefault(
+                    service,
+                    self.hive.service_health.get(service, ServiceHealth()),
+                )
+            if health != self.hive.service_health:
+                self.hive.service_health = health
+
+    def _task_poll(self) -> None:
+        while not self._stopped.wait(POLL_INTERVAL):
+            with self._lock:
+                if not self._pending:
+                    return
+            try:
+                self.poll()
+            except Exception as e:
+                _LOGGER.warning("Cannot refresh container states: %s", e)
+
+    def _on_deadline(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            _LOGGER.warning(
+                "Services %s not healthy within %ss",
+                sorted(self._pending),
+                self.hive.settings.startup_timeout,
+            )
+            changes = {
+                service: ServiceHealth(status="timeout") for service in self._pending
+            }
+            self._pending.clear()
+            self._update(changes)
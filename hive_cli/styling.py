@@ -25,6 +25,7 @@ UPDATE_STYLE = (
     "bg-purple-500 text-white py-2 px-4 rounded-lg text-center text-lg font-bold"
 )
 TEXT_INFO_STYLE = "text-sm text-gray-500"
+METRIC_STYLE = "font-family: monospace; white-space: nowrap;"
 
 ICO = """
 <svg width="100%" height="100%" viewBox="0 0 320 320" version="1.1" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" xml:space="preserve" xmlns:serif="http://www.serif.com/" style="fill-rule:evenodd;clip-rule:evenodd;stroke-linejoin:round;stroke-miterlimit:2;">
@@ -49,6 +50,15 @@ def list_files(startpath: Path) -> list[tuple[int, str]]:
     return out
 
 
+def sparkline(values: list[float]) -> str:
+    ticks = "▁▂▃▄▅▆▇█"
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    scale = (len(ticks) - 1) / (high - low) if high > low else 0
+    return "".join(ticks[round((value - low) * scale)] for value in values)
+
+
 def copy_icon(text: str, what: str) -> ui.icon:
     icon = ui.icon("content_copy")
     icon.on("click", lambda: copy_data(text, what))
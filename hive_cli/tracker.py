@@ -0,0 +1,126 @@
+import logging
+from threading import Event, Lock, Thread
+from typing import TYPE_CHECKING
+
+from docker.errors import NotFound
+
+from hive_cli.backend import PROJECT_LABEL, SdkBackend
+from hive_cli.data import ContainerState, DockerState, HiveData
+
+if TYPE_CHECKING:
+    from docker.types import CancellableStream
+
+_LOGGER = logging.getLogger(__name__)
+
+RUNNING_STATES = ("running", "paused", "restarting")
+RETRY_DELAY = 5
+
+
+class ContainerTracker:
+    """Keeps `HiveData.container_states` in sync with the engine's event stream."""
+
+    def __init__(self, hive: HiveData, backend: SdkBackend) -> None:
+        self.hive = hive
+        self.backend = backend
+        self.client = backend.client
+        self.project: str | None = None
+        self._states: dict[str, ContainerState] = {}
+        self._lock = Lock()
+        self._stream: CancellableStream | None = None
+        self._stopped = Event()
+        self._runner: Thread | None = None
+
+    @property
+    def active(self) -> bool:
+        return self._runner is not None and self._runner.is_alive()
+
+    @property
+    def states(self) -> list[ContainerState]:
+        with self._lock:
+            return sorted(self._states.values(), key=lambda state: state.name)
+
+    def follow(self, project: str | None) -> None:
+        if project == self.project and self.active:
+            return
+        self.stop()
+        self.project = project
+        if project is None:
+            return
+        self._stopped.clear()
+        self._open()
+        self._runner = Thread(target=self._task_follow, daemon=True)
+        self._runner.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._runner is not None:
+            self._runner.join(timeout=RETRY_DELAY)
+            self._runner = None
+        with self._lock:
+            self._states.clear()
+
+    def sync(self) -> None:
+        """Replace all tracked states with a single listing of the project."""
+        if self.project is None:
+            return
+        states = self.backend.project_containers(self.project)
+        with self._lock:
+            self._states = states
+        self._publish()
+
+    def _open(self) -> None:
+        self._stream = self.client.events(
+            decode=True,
+            filters={"type": "container", "label": f"{PROJECT_LABEL}={self.project}"},
+        )
+        # subscribe first so that no change between listing and streaming is lost
+        self.sync()
+
+    def _task_follow(self) -> None:
+        _LOGGER.debug("Following container events of project %s", self.project)
+        while not self._stopped.is_set():
+            try:
+                if self._stream is None:
+                    self._open()
+                for event in self._stream:  # type: ignore[union-attr]
+                    self._on_event(event)
+            except Exception as e:
+                if self._stopped.is_set():
+                    break
+                _LOGGER.warning("Container event stream failed: %s", e)
+            self._stream = None
+            self._stopped.wait(RETRY_DELAY)
+        _LOGGER.debug("Stopped following project %s", self.project)
+
+    def _on_event(self, event: dict) -> None:
+        action = event.get("Action", "")
+        if action.startswith(("exec_", "attach", "resize", "top")):
+            return
+        container_id = event.get("Actor", {}).get("ID", event.get("id"))
+        _LOGGER.debug("Container %s: %s", container_id[:12], action)
+        state = None
+        if action != "destroy":
+            try:
+                attrs = self.client.api.inspect_container(container_id)
+                state = ContainerState.from_attrs(attrs)
+            except NotFound:
+                pass
+        with self._lock:
+            if state is not None and state.state in RUNNING_STATES:
+                self._states[container_id] = state
+            elif self._states.pop(container_id, None) is None:
+                return
+        self._publish()
+
+    def _publish(self) -> None:
+        self.hive.set_container_states(self.states)
+        # transitional states are resolved by the task that set them
+        if self.hive.docker_state in [DockerState.STARTED, DockerState.STOPPED]:
+            self.hive.docker_state = (
+                DockerState.STARTED
+                if self.hive.container_states
+                else DockerState.STOPPED
+            )
@@ -0,0 +1,153 @@
+import logging
+from datetime import datetime
+from threading import Lock
+from time import time
+
+from pydantic import BaseModel
+
+from hive_cli import __version__
+from hive_cli.backend import Backend
+from hive_cli.config import UPDATE_CACHE
+from hive_cli.data import ClientState, HiveData
+from hive_cli.registry import RegistryClient
+
+_LOGGER = logging.getLogger(__name__)
+
+CLI_IMAGE = "ghcr.io/caretech-owl/hive-cli"
+RETRY_DELAY = 60
+MAX_BACKOFF = 24 * 60 * 60
+
+
+class UpdateCache(BaseModel):
+    # released tags are immutable, so the local digest never expires
+    local_digests: dict[str, str] = {}
+    remote_digest: str | None = None
+    remote_etag: str | None = None
+    available: bool | None = None
+    checked: float = 0
+    next_check: float = 0
+    failures: int = 0
+    # the hive-cli version `available` was determined for
+    version: str | None = None
+
+    def save(self) -> None:
+        _LOGGER.debug("Saving update cache to %s", UPDATE_CACHE)
+        with UPDATE_CACHE.open("w") as f:
+            f.write(self.model_dump_json(indent=2))
+
+    @classmethod
+    def load(cls) -> "UpdateCache":
+        if UPDATE_CACHE.exists():
+            try:
+                with UPDATE_CACHE.open() as f:
+                    return cls.model_validate_json(f.read())
+            except Exception as e:
+                _LOGGER.warning("Error loading update cache: %s", e)
+        return cls()
+
+
+class UpdateChecker:
+    """Checks whether a newer hive-cli image has been released.
+
+    The remote `latest` digest is requested at most every
+    `Settings.update_check_ttl` seconds with a conditional request. Failed
+    checks back off exponentially.
+    """
+
+    def __init__(self, hive: HiveData, backend: Backend) -> None:
+        self.hive = hive
+        self.backend = backend
+        self.registry = RegistryClient(CLI_IMAGE)
+        self.cache = UpdateCache.load()
+        self._lock = Lock()
+
+    @property
+    def environment(self) -> dict[str, str]:
+        return self.hive.recipe.environment if self.hive.recipe else {}
+
+    def _registry_digests(self) -> tuple[str, str]:
+        local = self.cache.local_digests.get(__version__)
+        if local is None:
+            local, _ = self.registry.manifest_digest(__version__)
+        remote, etag = self.registry.manifest_digest(
+            "latest", self.cache.remote_etag if self.cache.remote_digest else None
+        )
+        if remote is None:
+            _LOGGER.debug("hive-cli:latest not modified")
+            remote = self.cache.remote_digest
+        if local is None or remote is None:
+            msg = "Registry returned no digest for hive-cli"
+            raise ValueError(msg)
+        self.cache.local_digests = {__version__: local}
+        self.cache.remote_digest = remote
+        self.cache.remote_etag = etag
+        return local, remote
+
+    def _engine_digests(self) -> tuple[str | None, str]:
+        try:
+            local = self.backend.remote_digest(
+                f"{CLI_IMAGE}:{__version__}", self.environment
+            )
+        except Exception as e:
+            # assume an update when the local version is not found remotely
+            _LOGGER.warning(e)
+            local = None
+        remote = self.backend.remote_digest(f"{CLI_IMAGE}:latest", self.environment)
+        if remote is None:
+            msg = "Engine returned no digest for hive-cli:latest"
+            raise ValueError(msg)
+        return local, remote
+
+    def check(self, force: bool = False) -> None:
+        with self._lock:
+            now = time()
+            if self.cache.version != __version__:
+                _LOGGER.debug(
+                    "Discarding update check of version %s", self.cache.version
+                )
+                self.cache.version = __version__
+                self.cache.available = None
+                self.cache.failures = 0
+                self.cache.next_check = 0
+            if not force and now < self.cache.next_check:
+                _LOGGER.debug("Skipping hive-cli update check until TTL expired")
+            else:
+                self._check(now)
+        if self.cache.available is not None:
+            self._publish(self.cache.available)
+
+    def _check(self, now: float) -> None:
+        _LOGGER.info("Checking for hive-cli updates")
+        ttl = self.hive.settings.update_check_ttl
+        # a missing local digest counts as an available update
+        local: str | None
+        remote: str
+        try:
+            try:
+                local, remote = self._registry_digests()
+            except Exception as e:
+                _LOGGER.debug("Registry lookup failed, asking engine: %s", e)
+                local, remote = self._engine_digests()
+        except Exception as e:
+            self.cache.failures += 1
+            delay = min(RETRY_DELAY * 2 ** (self.cache.failures - 1), MAX_BACKOFF)
+            _LOGGER.warning("Update check failed (%s), retrying in %ds", e, delay)
+            self.cache.next_check = now + delay
+        else:
+            self.cache.available = local != remote
+            self.cache.failures = 0
+            self.cache.checked = now
+            self.cache.next_check = now + ttl
+        self.cache.save()
+
+    def _publish(self, available: bool) -> None:
+        if self.hive.client_state not in [
+            ClientState.UPDATING,
+            ClientState.RESTART_REQUIRED,
+        ]:
+            if available:
+                _LOGGER.info("hive-cli update available")
+            self.hive.client_state = (
+                ClientState.UPDATE_AVAILABLE if available else ClientState.UP_TO_DATE
+            )
+        self.hive.client_checked = datetime.fromtimestamp(self.cache.checked)
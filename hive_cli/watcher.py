@@ -0,0 +1,140 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+EVENT_HEADER = struct.Struct("iIII")
+POLL_INTERVAL = 1.0
+
+
+class RepoWatcher:
+    """Collects paths changed below a directory via Linux inotify.
+
+    `.git` is not watched. `on_change` receives the relative path of every
+    change; `None` signals that events were lost and a full scan is needed.
+    """
+
+    def __init__(self, root: Path, on_change: Callable[[str | None], None]) -> None:
+        self.root = root
+        self.on_change = on_change
+        self._fd: int | None = None
+        self._watches: dict[int, Path] = {}
+        self._lock = Lock()
+        self._stopped = Event()
+        self._runner: Thread | None = None
+        self._libc: ctypes.CDLL | None = None
+
+    @property
+    def active(self) -> bool:
+        return self._runner is not None and self._runner.is_alive()
+
+    def start(self) -> bool:
+        """Start watching; return False if inotify is not available."""
+        if self.active:
+            return True
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (AttributeError, OSError) as e:
+            _LOGGER.debug("inotify is not available: %s", e)
+            return False
+        if fd < 0:
+            error = os.strerror(ctypes.get_errno())
+            _LOGGER.warning("Cannot initialize inotify: %s", error)
+            return False
+        self._fd = fd
+        self._stopped.clear()
+        self._add_tree(self.root)
+        self._runner = Thread(target=self._task_watch, daemon=True)
+        self._runner.start()
+        return True
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._runner is not None:
+            self._runner.join(timeout=POLL_INTERVAL * 2)
+            self._runner = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._watches.clear()
+
+    def _add_watch(self, path: Path) -> None:
+        if self._fd is None or self._libc is None:
+            return
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(path), ctypes.c_uint32(WATCH_MASK)
+        )
+        if wd < 0:
+            _LOGGER.debug("Cannot watch %s: %s", path, os.strerror(ctypes.get_errno()))
+            return
+        with self._lock:
+            self._watches[wd] = path
+
+    def _add_tree(self, path: Path) -> None:
+        for directory, dirs, _ in os.walk(path):
+            if ".git" in dirs:
+                dirs.remove(".git")
+            self._add_watch(Path(directory))
+
+    def _task_watch(self) -> None:
+        _LOGGER.debug("Watching %s", self.root)
+        while not self._stopped.is_set() and self._fd is not None:
+            ready, _, _ = select.select([self._fd], [], [], POLL_INTERVAL)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            self._on_data(data)
+        _LOGGER.debug("Stopped watching %s", self.root)
+
+    def _on_data(self, data: bytes) -> None:
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0").decode(
+                "utf-8", "surrogateescape"
+            )
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                self.on_change(None)
+                continue
+            with self._lock:
+                directory = (
+                    self._watches.pop(wd, None)
+                    if mask & IN_IGNORED
+                    else self._watches.get(wd)
+                )
+            if directory is None or mask & IN_IGNORED:
+                continue
+            path = directory / name if name else directory
+            if name == ".git" and directory == self.root:
+                continue
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_tree(path)
+            self.on_change(path.relative_to(self.root).as_posix())
@@ -0,0 +1,62 @@
+from typing import Callable
+
+import pytest
+
+from hive_cli.backend import Backend
+from hive_cli.data import ContainerState, LocalImage, Recipe
+
+
+class FakeBackend(Backend):
+    """In-memory engine with configurable images and digests."""
+
+    def __init__(self) -> None:
+        self.local: list[LocalImage] = []
+        self.used: set[str] = set()
+        self.digests: dict[str, set[str]] = {}
+        self.remote: dict[str, str] = {}
+        self.removed: list[str] = []
+        self.pulled: list[str] = []
+        self.lookups: list[str] = []
+
+    def containers(self, recipe: Recipe) -> list[ContainerState]:  # noqa: ARG002
+        return []
+
+    def logs(self, recipe: Recipe, num_entries: int) -> list[str]:  # noqa: ARG002
+        return []
+
+    def pull(
+        self,
+        image: str,
+        environment: dict[str, str],  # noqa: ARG002
+        progress: Callable[[dict], None] | None = None,  # noqa: ARG002
+    ) -> None:
+        self.pulled.append(image)
+
+    def local_digests(self, image: str) -> set[str]:
+        return self.digests.get(image, set())
+
+    def remote_digest(
+        self, image: str, environment: dict[str, str]  # noqa: ARG002
+    ) -> str | None:
+        self.lookups.append(image)
+        return self.remote.get(image)
+
+    def images(self) -> list[LocalImage]:
+        return list(self.local)
+
+    def used_images(self) -> set[str]:
+        return set(self.used)
+
+    def remove_image(self, reference: str) -> None:
+        self.removed.append(reference)
+        for image in self.local:
+            if reference in image.tags:
+                image.tags.remove(reference)
+            if not image.tags or reference == image.id:
+                self.local.remove(image)
+                return
+
+
+@pytest.fixture
+def backend() -> FakeBackend:
+    return FakeBackend()
@@ -0,0 +1,139 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from hive_cli.backend import CliBackend, SdkBackend
+from hive_cli.data import Recipe
+from hive_cli.process import ProcessResult
+
+
+class FakeSupervisor:
+    """Answers commands by their last argument and records what was run."""
+
+    def __init__(self, outputs: dict[str, list[str]]) -> None:
+        self.outputs = outputs
+        self.commands: list[list[str]] = []
+
+    def run(self, cmd: list[str], **_: object) -> ProcessResult:
+        self.commands.append(cmd)
+        output = self.outputs.get(cmd[-1])
+        return ProcessResult(
+            cmd=cmd,
+            returncode=1 if output is None else 0,
+            output=output or [],
+            duration=0,
+        )
+
+
+class FakeApi:
+    def containers(self, filters: dict) -> list[dict]:  # noqa: ARG002
+        return [
+            {"Id": "a", "Names": ["/hive-web-1"]},
+            {"Id": "b", "Names": ["/hive-db-1"]},
+        ]
+
+    def logs(
+        self, container: str, tail: int, timestamps: bool  # noqa: ARG002
+    ) -> bytes:
+        lines = {
+            "a": ["2024-01-01T00:00:01Z GET /", "2024-01-01T00:00:03Z GET /api"],
+            "b": ["2024-01-01T00:00:02Z ready"],
+        }[container]
+        return "\n".join(lines).encode("utf-8")
+
+    def images(self) -> list[dict]:
+        return [
+            {
+                "Id": "sha256:1",
+                "RepoTags": ["nginx:latest"],
+                "RepoDigests": ["nginx@sha256:a"],
+                "Size": 10,
+                "Created": 100,
+            },
+            {"Id": "sha256:2", "RepoTags": ["<none>:<none>"], "RepoDigests": None},
+        ]
+
+    def inspect_image(self, image: str) -> dict:  # noqa: ARG002
+        return {"RepoDigests": ["nginx@sha256:a", "mirror/nginx@sha256:b"]}
+
+
+class FakeClient:
+    api = FakeApi()
+
+
+@pytest.fixture
+def recipe(tmp_path: Path) -> Recipe:
+    (tmp_path / "compose.yml").write_text("services:\n  web:\n    image: nginx\n")
+    return Recipe(
+        path=tmp_path / "hive.yml",
+        compose=["compose.yml"],
+        environment={"COMPOSE_PROJECT_NAME": "hive"},
+    )
+
+
+def test_sdk_backend_parses_engine_responses(recipe: Recipe) -> None:
+    backend = SdkBackend(FakeClient())  # type: ignore[arg-type]
+    assert backend.logs(recipe, 2) == ["hive-db-1  | ready", "hive-web-1  | GET /api"]
+    images = backend.images()
+    assert [(image.id, image.tags, image.digests) for image in images] == [
+        ("sha256:1", ["nginx:latest"], ["nginx@sha256:a"]),
+        ("sha256:2", [], []),
+    ]
+    assert backend.local_digests("nginx") == {"sha256:a", "sha256:b"}
+
+
+def test_cli_backend_parses_command_output(recipe: Recipe) -> None:
+    state = {
+        "Command": "nginx",
+        "CreatedAt": "2024-01-01",
+        "ExitCode": 0,
+        "Health": "",
+        "ID": "a",
+        "Image": "nginx",
+        "LocalVolumes": "0",
+        "Mounts": "",
+        "Name": "hive-web-1",
+        "Status": "Up 1 minute",
+        "State": "running",
+        "Service": "web",
+    }
+    image = {
+        "Id": "sha256:1",
+        "RepoTags": ["nginx:latest"],
+        "RepoDigests": None,
+        "Created": "2024-01-01T00:00:00.123456789Z",
+    }
+    supervisor = FakeSupervisor(
+        {
+            "json": [json.dumps(state), ""],
+            "--no-trunc": ["sha256:1", "sha256:1"],
+            "sha256:1": json.dumps([image], indent=2).splitlines(),
+            "nginx": ['["nginx@sha256:a"]'],
+        }
+    )
+    backend = CliBackend(supervisor, timeout=10)  # type: ignore[arg-type]
+    assert [state.name for state in backend.containers(recipe)] == ["hive-web-1"]
+    [local] = backend.images()
+    assert (local.id, local.tags, local.digests, local.created) == (
+        "sha256:1",
+        ["nginx:latest"],
+        [],
+        1704067200,
+    )
+    assert backend.local_digests("nginx") == {"sha256:a"}
+    assert backend.local_digests("redis") == set()
+
+
+def test_cli_backend_resolves_digests_with_buildx() -> None:
+    supervisor = FakeSupervisor({"version": ["v0.17.1"], "nginx": ["sha256:a\n"]})
+    backend = CliBackend(supervisor, timeout=10)  # type: ignore[arg-type]
+    assert backend.remote_digest("nginx", {}) == "sha256:a"
+    assert backend.remote_digest("nginx", {}) == "sha256:a"
+    assert [cmd[1] for cmd in supervisor.commands] == ["buildx"] * 3
+
+    supervisor = FakeSupervisor({"nginx": ["sha256:a"]})
+    backend = CliBackend(supervisor, timeout=10)  # type: ignore[arg-type]
+    assert not backend.resolves_digests
+    assert backend.remote_digest("nginx", {}) is None
+    assert len(supervisor.commands) == 1
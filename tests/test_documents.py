@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from hive_cli.data import ComposerFile, Recipe
+from hive_cli.documents import DocumentCache
+
+
+def test_document_cache_reuses_unchanged_files(tmp_path: Path) -> None:
+    path = tmp_path / "compose.yml"
+    path.write_text("services:\n  web:\n    image: nginx\n")
+    cache = DocumentCache(size=2)
+    first = cache.load(path, ComposerFile)
+    assert cache.load(path, ComposerFile) is first
+    assert cache.hits == 1
+    path.write_text("services:\n  web:\n    image: nginx:1.27\n")
+    assert cache.load(path, ComposerFile).images == ["nginx:1.27"]
+    assert cache.misses == 2
+
+
+def test_recipe_load(tmp_path: Path) -> None:
+    path = tmp_path / "hive.yml"
+    path.write_text("compose:\n  - compose.yml\n")
+    recipe = Recipe.load(path)
+    assert recipe.path == path
+    assert recipe.compose == ["compose.yml"]
+    assert Recipe.load(path) is recipe
@@ -0,0 +1,43 @@
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+from hive_cli import __version__, images
+from hive_cli.config import Settings
+from hive_cli.data import HiveData, LocalImage
+from hive_cli.images import ImageCache, normalize_reference
+from hive_cli.update import CLI_IMAGE
+
+if TYPE_CHECKING:
+    from conftest import FakeBackend
+
+
+def test_normalize_reference() -> None:
+    assert normalize_reference("nginx") == "nginx:latest"
+    assert normalize_reference("docker.io/library/postgres:16") == "postgres:16"
+    assert normalize_reference("localhost:5000/app") == "localhost:5000/app:latest"
+    assert normalize_reference("ghcr.io/org/app:1.0") == "ghcr.io/org/app:1.0"
+    assert normalize_reference("app@sha256:abc") == "app@sha256:abc"
+
+
+def test_evict_unreferenced_images(
+    backend: "FakeBackend",
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    monkeypatch.setattr(images, "IMAGE_CACHE", tmp_path / "images.json")
+    backend.local = [
+        LocalImage(id="sha256:new", tags=["app:2"], size=60, created=2),
+        LocalImage(id="sha256:old", tags=["app:1"], size=60, created=1),
+        LocalImage(id="sha256:cli", tags=[f"{CLI_IMAGE}:{__version__}"], size=60),
+        LocalImage(id="sha256:used", size=60),
+    ]
+    backend.used = {"sha256:used"}
+    hive = HiveData(settings=Settings(image_budget=150))
+    ImageCache(hive, backend).evict()
+    assert backend.removed == ["app:1", "app:2"]
+    assert [image.id for image in backend.local] == ["sha256:cli", "sha256:used"]
+    assert hive.image_cache is not None
+    assert hive.image_cache.evicted == 2
+    assert hive.image_cache.usage == 120
@@ -0,0 +1,104 @@
+import logging
+from threading import Event
+from time import sleep
+
+from hive_cli.config import Settings
+from hive_cli.data import HiveData, LogDelta
+from hive_cli.logs import (
+    PUBLISH_INTERVAL,
+    LogBuffer,
+    LogBufferHandler,
+    LogFeed,
+    LogPublisher,
+)
+
+
+def test_log_buffer_tail() -> None:
+    buffer = LogBuffer(size=3)
+    for i in range(3):
+        buffer.append(f"web {i}")
+    buffer.append("db 0")
+    assert buffer.tail(10) == ["web 1", "web 2", "db 0"]
+    assert buffer.tail(2) == ["web 2", "db 0"]
+    assert buffer.tail(0) == []
+
+
+def test_log_buffer_since() -> None:
+    buffer = LogBuffer(size=2)
+    buffer.append("first")
+    seq, lines = buffer.since(0)
+    assert lines == ["first"]
+    buffer.append("second")
+    assert buffer.since(seq) == (2, ["second"])
+    buffer.append("third")
+    assert buffer.since(0) == (3, ["second", "third"])
+    assert buffer.since(3) == (3, [])
+    buffer.clear()
+    buffer.append("fourth")
+    assert buffer.since(3) == (4, ["fourth"])
+
+
+def test_log_publisher_repeated_lines() -> None:
+    hive = HiveData(settings=Settings())
+    buffer = LogBuffer(size=10)
+    publisher = LogPublisher(hive, "client_logs_delta", buffer)
+    buffer.append("x")
+    buffer.append("x")
+    publisher.publish()
+    buffer.append("x")
+    buffer.append("x")
+    publisher.publish()
+    assert hive.client_logs_delta.appended == ["x", "x"]
+    assert hive.client_logs_delta.seq == 4
+    publisher.publish(reset=True)
+    assert hive.client_logs_delta.reset
+    assert hive.client_logs_delta.appended == []
+
+
+def test_log_buffer_handler() -> None:
+    handler = LogBufferHandler(LogBuffer(size=10))
+    appended: list[int] = []
+    handler.on_append = lambda: appended.append(handler.buffer.seq)
+    logger = logging.getLogger("tests.handler")
+    logger.addHandler(handler)
+    logger.warning("first")
+    logger.warning("second")
+    logger.removeHandler(handler)
+    assert handler.buffer.tail(10) == ["first", "second"]
+    assert appended == [1, 2]
+
+
+def test_log_publisher_batches_requests() -> None:
+    hive = HiveData(settings=Settings())
+    buffer = LogBuffer(size=100)
+    publisher = LogPublisher(hive, "container_logs_delta", buffer)
+    deltas: list[LogDelta] = []
+    published = Event()
+
+    def _on_delta(delta: LogDelta) -> None:
+        deltas.append(delta)
+        published.set()
+
+    hive.events.container_logs_delta.connect(_on_delta)
+    for i in range(50):
+        buffer.append(f"line {i}")
+        publisher.request()
+    assert published.wait(5)
+    sleep(2 * PUBLISH_INTERVAL)
+    assert len(deltas) == 1
+    assert len(deltas[0].appended) == 50
+
+
+def test_log_feed_since() -> None:
+    feed = LogFeed(size=3)
+    feed.feed(["a", "b"])
+    seq, lines, reset = feed.since(0)
+    assert (lines, reset) == (["a", "b"], False)
+    feed.feed(["c"])
+    assert feed.since(seq) == (3, ["c"], False)
+    feed.feed(["d", "e"])
+    assert feed.since(seq) == (5, ["c", "d", "e"], False)
+    assert feed.since(1) == (5, ["c", "d", "e"], True)
+    feed.feed(["x"], reset=True)
+    assert feed.since(5) == (7, ["x"], True)
+    assert feed.since(7) == (7, [], False)
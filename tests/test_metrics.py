@@ -0,0 +1,125 @@
+from queue import Queue
+from time import monotonic, sleep
+from typing import Callable, Iterator
+
+import pytest
+
+from hive_cli import metrics
+from hive_cli.config import Settings
+from hive_cli.data import ContainerState, HiveData
+from hive_cli.metrics import ContainerStats, MetricsCollector, RingBuffer
+
+
+def sample(total: int, system: int, memory: int) -> dict:
+    return {
+        "cpu_stats": {
+            "cpu_usage": {"total_usage": total},
+            "system_cpu_usage": system,
+            "online_cpus": 2,
+        },
+        "precpu_stats": {"cpu_usage": {"total_usage": 0}, "system_cpu_usage": 0},
+        "memory_stats": {
+            "usage": memory,
+            "limit": 1000,
+            "stats": {"inactive_file": 100},
+        },
+        "networks": {"eth0": {"rx_bytes": 1, "tx_bytes": 2}},
+        "blkio_stats": {
+            "io_service_bytes_recursive": [
+                {"op": "Read", "value": 3},
+                {"op": "Write", "value": 4},
+            ]
+        },
+    }
+
+
+def test_ring_buffer_keeps_latest_values_in_order() -> None:
+    buffer = RingBuffer(3)
+    buffer.append(1)
+    assert buffer.values() == [1]
+    for value in range(2, 6):
+        buffer.append(value)
+    assert buffer.values() == [3, 4, 5]
+
+
+def test_container_stats_update(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 100.0
+    monkeypatch.setattr(metrics, "monotonic", lambda: now)
+    stats = ContainerStats("web-1", size=10)
+    stats.update(sample(25, 100, 600), interval=5)
+    snapshot = stats.snapshot()
+    assert snapshot.cpu == 50
+    assert (snapshot.memory, snapshot.memory_limit) == (500, 1000)
+    assert (snapshot.net_rx, snapshot.net_tx) == (1, 2)
+    assert (snapshot.blk_read, snapshot.blk_write) == (3, 4)
+    # samples within the interval update the metrics but not the history
+    now += 1
+    stats.update(sample(50, 100, 600), interval=5)
+    now += 5
+    stats.update(sample(10, 100, 300), interval=5)
+    snapshot = stats.snapshot()
+    assert snapshot.cpu == 20
+    assert snapshot.cpu_history == [50, 20]
+    assert snapshot.memory_history == [500, 200]
+
+
+class FakeApi:
+    def __init__(self) -> None:
+        self.streams: dict[str, Queue[dict | None]] = {}
+
+    def stats(
+        self, container: str, stream: bool, decode: bool  # noqa: ARG002
+    ) -> Iterator[dict]:
+        queue = self.streams.setdefault(container, Queue())
+        while (item := queue.get()) is not None:
+            yield item
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.api = FakeApi()
+
+
+def container(name: str, state: str = "running") -> ContainerState:
+    return ContainerState(
+        Command="",
+        CreatedAt="",
+        ExitCode=0,
+        Health="",
+        ID=name,
+        Image="nginx",
+        LocalVolumes="0",
+        Mounts="",
+        Name=name,
+        Status="",
+        State=state,
+        Service=name.split("-")[0],
+    )
+
+
+def wait_until(predicate: Callable[[], bool]) -> None:
+    deadline = monotonic() + 2
+    while not predicate():
+        assert monotonic() < deadline
+        sleep(0.01)
+
+
+def test_collector_follows_running_containers(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    hive = HiveData(settings=Settings())
+    monkeypatch.setattr(hive.settings, "metrics_interval", 0.01)
+    client = FakeClient()
+    collector = MetricsCollector(hive, client)  # type: ignore[arg-type]
+    collector.follow([container("web-1"), container("db-1", "exited")])
+    wait_until(lambda: "web-1" in client.api.streams)
+    client.api.streams["web-1"].put(sample(25, 100, 600))
+    wait_until(lambda: "web-1" in hive.container_metrics)
+    assert hive.container_metrics["web-1"].cpu == 50
+    assert "db-1" not in client.api.streams
+
+    # a container that stops has its stream dropped from the published metrics
+    collector.follow([container("web-1", "exited")])
+    wait_until(lambda: hive.container_metrics == {})
+    collector.stop()
+    client.api.streams["web-1"].put(None)
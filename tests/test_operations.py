@@ -0,0 +1,108 @@
+from threading import Event
+
+import pytest
+
+from hive_cli.config import Settings
+from hive_cli.data import HiveData
+from hive_cli.operations import OperationKind, OperationScheduler
+
+START = OperationKind.START
+STOP = OperationKind.STOP
+RESTART = OperationKind.RESTART
+
+
+def run_queued(submitted: list[OperationKind]) -> list[OperationKind]:
+    """Submit `submitted` behind a blocked operation and return what ran."""
+    blocked = Event()
+    done = Event()
+    calls: list[OperationKind] = []
+
+    def handler(kind: OperationKind):  # noqa: ANN202
+        def run() -> None:
+            if kind == OperationKind.UPDATE_CLI:
+                blocked.wait(5)
+            elif kind == OperationKind.EVICT_IMAGES:
+                done.set()
+            else:
+                calls.append(kind)
+
+        return run
+
+    scheduler = OperationScheduler(
+        HiveData(settings=Settings()), {kind: handler(kind) for kind in OperationKind}
+    )
+    scheduler.submit(OperationKind.UPDATE_CLI)
+    for kind in submitted:
+        scheduler.submit(kind)
+    scheduler.submit(OperationKind.EVICT_IMAGES)
+    blocked.set()
+    assert done.wait(5)
+    scheduler.stop()
+    return calls
+
+
+def test_operations_are_coalesced() -> None:
+    assert run_queued(
+        [STOP, START, OperationKind.CHECK_UPDATE, OperationKind.CHECK_UPDATE]
+    ) == [RESTART, OperationKind.CHECK_UPDATE]
+
+
+@pytest.mark.parametrize(
+    ("submitted", "expected"),
+    [
+        ([START, STOP, START], [RESTART]),
+        ([STOP, START, STOP], [STOP]),
+        ([RESTART, STOP], [STOP]),
+        ([RESTART, START], [RESTART]),
+        (
+            [START, OperationKind.CHECK_UPDATE, START],
+            [START, OperationKind.CHECK_UPDATE, START],
+        ),
+    ],
+)
+def test_last_lifecycle_operation_wins(
+    submitted: list[OperationKind], expected: list[OperationKind]
+) -> None:
+    assert run_queued(submitted) == expected
+
+
+def test_callbacks_run_after_failures() -> None:
+    called = Event()
+
+    def fail(images: list[str]) -> None:
+        msg = f"Cannot pull {images}"
+        raise OSError(msg)
+
+    scheduler = OperationScheduler(
+        HiveData(settings=Settings()), {OperationKind.PULL: fail}
+    )
+    scheduler.submit(OperationKind.PULL, images=["nginx"], callback=called.set)
+    assert called.wait(5)
+    scheduler.stop()
+
+
+def test_idempotent_operations_merge_across_the_queue() -> None:
+    started = Event()
+    release = Event()
+
+    def start() -> None:
+        started.set()
+        release.wait(5)
+
+    scheduler = OperationScheduler(
+        HiveData(settings=Settings()),
+        {
+            START: start,
+            OperationKind.CHECK_UPDATE: lambda: None,
+            OperationKind.EVICT_IMAGES: lambda: None,
+        },
+    )
+    scheduler.submit(START)
+    assert started.wait(5)
+    for _ in range(5):
+        scheduler.submit(OperationKind.CHECK_UPDATE)
+        scheduler.submit(OperationKind.EVICT_IMAGES)
+    assert scheduler.depth == 2
+    assert scheduler.stats.coalesced == 8
+    release.set()
+    scheduler.stop()
@@ -0,0 +1,32 @@
+import os
+from pathlib import Path
+
+from hive_cli.data import Recipe
+
+
+def test_compose_plan_is_cached_until_files_change(tmp_path: Path) -> None:
+    compose = tmp_path / "compose.yml"
+    compose.write_text("services:\n  web:\n    image: nginx\n")
+    recipe = Recipe(path=tmp_path / "hive.yml", compose=["compose.yml"])
+    plan = recipe.plan()
+    assert recipe.plan() is plan
+    assert plan.images == ["nginx"]
+
+    compose.write_text("services:\n  web:\n    image: nginx:1.27\n")
+    changed = recipe.plan()
+    assert changed is not plan
+    assert changed.images == ["nginx:1.27"]
+
+    stat = compose.stat()
+    os.utime(compose, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert recipe.plan() is not changed
+
+
+def test_compose_plan_follows_compose_list(tmp_path: Path) -> None:
+    (tmp_path / "compose.yml").write_text("services:\n  web:\n    image: nginx\n")
+    recipe = Recipe(path=tmp_path / "hive.yml", compose=["compose.yml"])
+    plan = recipe.plan()
+    recipe.compose.append("missing.yml")
+    updated = recipe.plan()
+    assert updated is not plan
+    assert not updated.files[(tmp_path / "missing.yml").resolve()]
@@ -0,0 +1,35 @@
+import sys
+
+from hive_cli.process import MAX_LINE, ProcessSupervisor
+
+
+def test_supervisor_collects_output() -> None:
+    supervisor = ProcessSupervisor(max_processes=2)
+    result = supervisor.run([sys.executable, "-c", "print('a'); print('b')"])
+    assert result.ok
+    assert result.output == ["a", "b"]
+
+
+def test_supervisor_kills_on_timeout() -> None:
+    supervisor = ProcessSupervisor(max_processes=1)
+    result = supervisor.run(["sleep", "10"], timeout=0.2)
+    assert result.timed_out
+    assert not result.ok
+    assert result.duration < 5
+
+
+def test_supervisor_splits_long_lines() -> None:
+    supervisor = ProcessSupervisor(max_processes=1)
+    lines: list[str] = []
+    result = supervisor.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; sys.stdout.buffer.write("
+            f"b'x' * {MAX_LINE + 10} + b'\\n\\xff')",
+        ],
+        on_line=lines.append,
+    )
+    assert result.ok
+    assert [len(line) for line in lines] == [MAX_LINE, 10, 1]
+    assert lines[-1] == "\ufffd"
@@ -0,0 +1,93 @@
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+from hive_cli import pull
+from hive_cli.config import Settings
+from hive_cli.data import HiveData
+from hive_cli.pull import ImagePuller, ProgressAggregator
+
+if TYPE_CHECKING:
+    from conftest import FakeBackend
+
+
+@pytest.fixture
+def hive(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> HiveData:
+    monkeypatch.setattr(pull, "DIGEST_CACHE", tmp_path / "digests.json")
+    return HiveData(settings=Settings(digest_ttl=60))
+
+
+def test_is_current_uses_cached_digest(
+    hive: HiveData,
+    backend: "FakeBackend",
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    backend.digests["nginx"] = {"nginx@sha256:a"}
+    backend.remote["nginx"] = "nginx@sha256:a"
+    puller = ImagePuller(hive, backend)
+    now = 1000.0
+    monkeypatch.setattr(pull, "time", lambda: now)
+    assert puller.is_current("nginx") == (True, "nginx@sha256:a")
+    assert puller.is_current("nginx") == (True, "nginx@sha256:a")
+    assert backend.lookups == ["nginx"]
+    now += 61
+    backend.remote["nginx"] = "nginx@sha256:b"
+    assert puller.is_current("nginx") == (False, "nginx@sha256:b")
+    assert backend.lookups == ["nginx", "nginx"]
+
+
+def test_pull_skips_current_images(hive: HiveData, backend: "FakeBackend") -> None:
+    backend.digests["nginx"] = {"nginx@sha256:a"}
+    backend.remote = {"nginx": "nginx@sha256:a", "redis": "redis@sha256:b"}
+    results = ImagePuller(hive, backend).pull(["nginx", "redis", "nginx"])
+    assert [(result.image, result.skipped) for result in results] == [
+        ("nginx", True),
+        ("redis", False),
+    ]
+    assert backend.pulled == ["redis"]
+    assert hive.pull_progress is None
+
+
+def downloading(layer: str, current: int, total: int) -> dict:
+    return {
+        "id": layer,
+        "status": "Downloading",
+        "progressDetail": {"current": current, "total": total},
+    }
+
+
+def test_progress_totals_and_eta(
+    hive: HiveData, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    now = 0.0
+    monkeypatch.setattr(pull, "monotonic", lambda: now)
+    progress = ProgressAggregator(hive, images=2)
+    now = 1.0
+    progress.update("a", downloading("l1", 50, 100))
+    progress.update("b", downloading("l2", 0, 100))
+    progress.update("b", {"id": "l3", "status": "Extracting"})
+    now = 10.0
+    snapshot = progress.snapshot()
+    assert (snapshot.done, snapshot.total) == (50, 200)
+    assert snapshot.throughput == 5
+    assert snapshot.eta == 30
+    progress.update("b", {"id": "l2", "status": "Download complete"})
+    progress.finish()
+    snapshot = progress.snapshot()
+    assert (snapshot.done, snapshot.finished) == (150, 1)
+    assert hive.pull_progress == snapshot
+
+
+def test_is_current_skips_lookups_without_digests(
+    hive: HiveData,
+    backend: "FakeBackend",
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    backend.digests["nginx"] = {"nginx@sha256:a"}
+    backend.remote["nginx"] = "nginx@sha256:a"
+    monkeypatch.setattr(type(backend), "resolves_digests", False)
+    results = ImagePuller(hive, backend).pull(["nginx"])
+    assert not results[0].skipped
+    assert backend.lookups == []
+    assert backend.pulled == ["nginx"]
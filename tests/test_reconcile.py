@@ -0,0 +1,14 @@
+from hive_cli.data import ComposerService
+from hive_cli.reconcile import dependents
+
+
+def test_dependents_are_transitive() -> None:
+    services = {
+        "db": ComposerService(image="postgres:16"),
+        "api": ComposerService(image="api:1", depends_on=["db"]),
+        "web": ComposerService(image="web:1", depends_on=["api"]),
+        "worker": ComposerService(image="worker:1"),
+    }
+    assert dependents(services, {"db"}) == {"api", "web"}
+    assert dependents(services, {"api"}) == {"web"}
+    assert dependents(services, {"worker"}) == set()
@@ -0,0 +1,55 @@
+import logging
+
+from hive_cli.logs import LogBuffer, LogBufferHandler
+from hive_cli.refresh import UNBUFFERED_LOGGERS, RefreshScheduler
+
+
+class _Component:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def refresh(self) -> None:
+        self.count += 1
+
+
+class _Owner:
+    def __init__(self) -> None:
+        self.status = _Component()
+        self.footer = _Component()
+
+
+def test_refresh_batched() -> None:
+    owner = _Owner()
+    scheduler = RefreshScheduler(owner)
+    scheduler.mark("status", "footer")
+    scheduler.mark("status")
+    scheduler.mark("status")
+    scheduler.flush()
+    scheduler.flush()
+    assert owner.status.count == 1
+    assert owner.footer.count == 1
+    assert scheduler.saved == 2
+
+
+class _Failing:
+    def refresh(self) -> None:
+        msg = "gone"
+        raise RuntimeError(msg)
+
+
+def test_idle_flush_refreshes_nothing() -> None:
+    owner = _Owner()
+    owner.status = _Failing()  # type: ignore[assignment]
+    scheduler = RefreshScheduler(owner)
+    handler = LogBufferHandler(LogBuffer(size=10), exclude=UNBUFFERED_LOGGERS)
+    handler.on_append = lambda: scheduler.mark("footer")
+    logger = logging.getLogger("hive_cli")
+    logger.addHandler(handler)
+    try:
+        scheduler.mark("status")
+        for _ in range(3):
+            scheduler.flush()
+    finally:
+        logger.removeHandler(handler)
+    assert owner.footer.count == 0
+    assert scheduler.refreshed == 1
@@ -0,0 +1,176 @@
+from pathlib import Path
+from threading import Event, Thread
+from time import monotonic, sleep
+from types import SimpleNamespace
+
+import pytest
+
+from hive_cli import repo as repo_module
+from hive_cli.config import Settings
+from hive_cli.data import HiveData, RepoState
+from hive_cli.process import get_supervisor
+from hive_cli.repo import RepoController, ref_sha
+
+
+class FakeRemote:
+    def __init__(self) -> None:
+        self.fetches = 0
+        self.release = Event()
+        self.release.set()
+        self.refs = SimpleNamespace(main=SimpleNamespace(commit=SimpleNamespace()))
+        self.refs.main.commit.hexsha = "1" * 40
+
+    def fetch(self, **kwargs: object) -> None:  # noqa: ARG002
+        self.fetches += 1
+        self.release.wait(5)
+
+
+class FakeRepo:
+    def __init__(self) -> None:
+        self.origin = FakeRemote()
+
+    def remote(self, name: str) -> FakeRemote:  # noqa: ARG002
+        return self.origin
+
+
+def controller(tmp_path: Path) -> tuple[RepoController, FakeRemote]:
+    hive = HiveData(settings=Settings(hive_repo=tmp_path / "missing"))
+    repo = RepoController(hive)
+    fake = FakeRepo()
+    repo.repo = fake  # type: ignore[assignment]
+    return repo, fake.origin
+
+
+def test_fetch_min_age(tmp_path: Path) -> None:
+    repo, origin = controller(tmp_path)
+    repo.fetch()
+    repo.fetch()
+    assert origin.fetches == 1
+    repo.fetch(force=True)
+    assert origin.fetches == 2
+
+
+def test_fetch_skipped_while_remote_head_matches(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    repo, origin = controller(tmp_path)
+    monkeypatch.setattr(repo.hive.settings, "fetch_min_age", 0)
+    head: str | None = "1" * 40
+    monkeypatch.setattr(repo, "remote_head", lambda: head)
+    repo.fetch()
+    assert origin.fetches == 0
+    head = "2" * 40
+    repo.fetch()
+    assert origin.fetches == 1
+    # a failed ref advertisement falls back to fetching
+    head = None
+    repo.fetch()
+    assert origin.fetches == 2
+
+
+def test_concurrent_fetches_are_shared(tmp_path: Path) -> None:
+    repo, origin = controller(tmp_path)
+    origin.release.clear()
+    first = Thread(target=repo.fetch, kwargs={"force": True})
+    first.start()
+    while origin.fetches == 0:
+        sleep(0.01)
+    second = Thread(target=repo.fetch, kwargs={"force": True})
+    second.start()
+    sleep(0.2)
+    origin.release.set()
+    first.join(5)
+    second.join(5)
+    assert origin.fetches == 1
+
+
+def test_ref_sha() -> None:
+    lines = [
+        "warning: redirecting to https://example.com/hive.git/",
+        "1111111111111111111111111111111111111111\trefs/heads/main-old",
+        "2222222222222222222222222222222222222222\trefs/heads/main",
+    ]
+    assert ref_sha(lines, "refs/heads/main") == "2" * 40
+    assert ref_sha(lines, "refs/heads/dev") is None
+    assert ref_sha([], "refs/heads/main") is None
+
+
+def git(path: Path, *args: str) -> None:
+    identity = ["-c", "user.name=hive", "-c", "user.email=hive@example.com"]
+    get_supervisor().run(["git", "-C", path.as_posix(), *identity, *args]).check()
+
+
+@pytest.fixture
+def origin(tmp_path: Path) -> Path:
+    path = tmp_path / "origin"
+    (path / "web").mkdir(parents=True)
+    (path / "hive1.yml").write_text("compose:\n  - compose.yml\n")
+    (path / "compose.yml").write_text("services: {}\n")
+    (path / "web" / "compose.yml").write_text("services: {}\n")
+    (path / "hive2.yml").write_text("compose: []\n")
+    git(path, "init", "-b", "main")
+    git(path, "config", "uploadpack.allowFilter", "true")
+    git(path, "add", "-A")
+    git(path, "commit", "-m", "init")
+    return path
+
+
+def test_sparse_clone_checks_out_recipe_files(tmp_path: Path, origin: Path) -> None:
+    clone = tmp_path / "clone"
+    settings = Settings(
+        hive_id="hive1",
+        hive_url=origin.as_uri(),
+        hive_repo=clone,
+        clone_mode="sparse",
+    )
+    repo = RepoController(HiveData(settings=settings))
+    try:
+        repo.init_repo()
+        assert repo.sparse
+        assert (clone / "hive1.yml").exists()
+        assert (clone / "compose.yml").exists()
+        assert not (clone / "hive2.yml").exists()
+        assert not (clone / "web").exists()
+        repo.update_sparse(["compose.yml", "web/compose.yml", "/etc/compose.yml"])
+        assert (clone / "web" / "compose.yml").exists()
+        assert not (clone / "hive2.yml").exists()
+    finally:
+        repo.shutdown()
+
+
+def test_watcher_invalidates_dirty_state(
+    tmp_path: Path, origin: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(repo_module, "CHANGE_DEBOUNCE", 0.05)
+    clone = tmp_path / "clone"
+    git(tmp_path, "clone", origin.as_uri(), clone.as_posix())
+    hive = HiveData(settings=Settings(hive_url=origin.as_uri(), hive_repo=clone))
+    repo = RepoController(hive)
+    try:
+        if not repo.watcher.active:
+            pytest.skip("inotify is not available")
+        assert hive.repo_state == RepoState.UP_TO_DATE
+        statuses = []
+        is_dirty = repo.repo.is_dirty  # type: ignore[union-attr]
+
+        def counting(**kwargs: bool) -> bool:
+            statuses.append(kwargs)
+            return is_dirty(**kwargs)
+
+        monkeypatch.setattr(repo.repo, "is_dirty", counting)
+        # without changes the watcher makes `git status` unnecessary
+        assert not repo.is_dirty()
+        assert statuses == []
+        (clone / "compose.yml").write_text("services:\n  web: {}\n")
+        deadline = monotonic() + 5
+        while hive.repo_state != RepoState.CHANGED_LOCALLY:
+            assert monotonic() < deadline
+            sleep(0.01)
+        assert len(statuses) == 1
+        assert repo.is_dirty()
+        assert len(statuses) == 1
+        repo.invalidate()
+        assert repo.is_dirty()
+        assert len(statuses) == 2
+    finally:
+        repo.shutdown()
@@ -0,0 +1,11 @@
+from hive_cli import serialize
+
+
+def test_round_trip_large_compose() -> None:
+    document = {
+        "services": {
+            f"service-{i}": {"image": f"app:{i}", "ports": [f"{8000 + i}:80"]}
+            for i in range(300)
+        }
+    }
+    assert serialize.load(serialize.dump(document)) == document
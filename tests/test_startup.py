@@ -0,0 +1,55 @@
+from threading import Event
+from time import monotonic
+
+import pytest
+
+from hive_cli import startup
+from hive_cli.config import Settings
+from hive_cli.data import ComposerService, ContainerState, HiveData
+from hive_cli.startup import StartupTracker
+
+
+def test_service_publishes_host_ports() -> None:
+    service = ComposerService(
+        ports=["8080:80", "127.0.0.1:9000:9000/tcp", "7000-7002:7000-7002", "5432"]
+    )
+    assert service.publishes(8080)
+    assert service.publishes(9000)
+    assert service.publishes(7001)
+    assert not service.publishes(80)
+    assert not service.publishes(5432)
+
+
+def container(health: str) -> ContainerState:
+    return ContainerState(
+        Command="",
+        CreatedAt="",
+        ExitCode=0,
+        Health=health,
+        ID="web-1",
+        Image="nginx",
+        LocalVolumes="0",
+        Mounts="",
+        Name="web-1",
+        Status="",
+        State="running",
+        Service="web",
+    )
+
+
+def test_startup_polls_until_healthy(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(startup, "POLL_INTERVAL", 0.01)
+    hive = HiveData(settings=Settings())
+    hive.container_states = [container("starting")]
+    polled = Event()
+
+    def poll() -> None:
+        hive.container_states = [container("healthy")]
+        polled.set()
+
+    tracker = StartupTracker(hive, poll)
+    tracker.begin(["web"], monotonic())
+    assert hive.service_health["web"].status == "starting"
+    assert polled.wait(5)
+    assert hive.service_health["web"].healthy
+    tracker.stop()
@@ -0,0 +1,140 @@
+from queue import Queue
+from time import monotonic, sleep
+from typing import Callable, Iterator
+
+import pytest
+from docker.errors import NotFound
+
+from hive_cli import tracker
+from hive_cli.backend import SdkBackend
+from hive_cli.config import Settings
+from hive_cli.data import HiveData
+from hive_cli.tracker import ContainerTracker
+
+
+def attrs(name: str, status: str = "running") -> dict:
+    return {
+        "Id": name,
+        "Name": f"/{name}",
+        "State": {
+            "Status": status,
+            "Running": status == "running",
+            "StartedAt": "2024-01-01T00:00:00",
+        },
+        "Config": {"Labels": {"com.docker.compose.service": name.split("-")[0]}},
+    }
+
+
+class FakeStream:
+    def __init__(self) -> None:
+        self.queue: Queue[dict | Exception | None] = Queue()
+
+    def __iter__(self) -> Iterator[dict]:
+        while (item := self.queue.get()) is not None:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self) -> None:
+        self.queue.put(None)
+
+
+class FakeApi:
+    def __init__(self) -> None:
+        self.running: dict[str, dict] = {}
+        self.listings = 0
+
+    def containers(self, filters: dict) -> list[dict]:  # noqa: ARG002
+        self.listings += 1
+        return [{"Id": name} for name in self.running]
+
+    def inspect_container(self, container_id: str) -> dict:
+        if container_id not in self.running:
+            raise NotFound(container_id)
+        return self.running[container_id]
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.api = FakeApi()
+        self.streams: list[FakeStream] = []
+        self.available = True
+
+    def events(self, decode: bool, filters: dict) -> FakeStream:  # noqa: ARG002
+        if not self.available:
+            msg = "events not supported"
+            raise RuntimeError(msg)
+        self.streams.append(FakeStream())
+        return self.streams[-1]
+
+
+def event(action: str, name: str) -> dict:
+    return {"Action": action, "Actor": {"ID": name}}
+
+
+def wait_until(predicate: Callable[[], bool]) -> None:
+    deadline = monotonic() + 2
+    while not predicate():
+        assert monotonic() < deadline
+        sleep(0.01)
+
+
+@pytest.fixture
+def client() -> FakeClient:
+    client = FakeClient()
+    client.api.running["web-1"] = attrs("web-1")
+    return client
+
+
+@pytest.fixture
+def follower(client: FakeClient) -> Iterator[ContainerTracker]:
+    hive = HiveData(settings=Settings())
+    follower = ContainerTracker(hive, SdkBackend(client))  # type: ignore[arg-type]
+    yield follower
+    follower.stop()
+
+
+def names(follower: ContainerTracker) -> list[str]:
+    return [state.name for state in follower.hive.container_states]
+
+
+def test_tracker_applies_events(
+    client: FakeClient, follower: ContainerTracker
+) -> None:
+    follower.follow("hive")
+    assert names(follower) == ["web-1"]
+    client.api.running["db-1"] = attrs("db-1")
+    client.streams[-1].queue.put(event("start", "db-1"))
+    wait_until(lambda: names(follower) == ["db-1", "web-1"])
+    client.api.running["web-1"] = attrs("web-1", "exited")
+    client.streams[-1].queue.put(event("exec_start", "web-1"))
+    client.streams[-1].queue.put(event("die", "web-1"))
+    wait_until(lambda: names(follower) == ["db-1"])
+    del client.api.running["db-1"]
+    client.streams[-1].queue.put(event("destroy", "db-1"))
+    wait_until(lambda: names(follower) == [])
+    assert client.api.listings == 1
+
+
+def test_tracker_reconnects_and_lists_again(
+    client: FakeClient, follower: ContainerTracker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(tracker, "RETRY_DELAY", 0.01)
+    follower.follow("hive")
+    # changes while the stream is down are only seen by listing again
+    client.api.running["db-1"] = attrs("db-1")
+    client.streams[-1].queue.put(ConnectionError("engine restarted"))
+    wait_until(lambda: names(follower) == ["db-1", "web-1"])
+    assert len(client.streams) == 2
+    assert client.api.listings == 2
+    assert follower.active
+
+
+def test_tracker_without_events_leaves_polling_active(
+    client: FakeClient, follower: ContainerTracker
+) -> None:
+    client.available = False
+    with pytest.raises(RuntimeError):
+        follower.follow("hive")
+    # DockerController polls the backend while the tracker is inactive
+    assert not follower.active
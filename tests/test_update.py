@@ -0,0 +1,91 @@
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+from hive_cli import update
+from hive_cli.config import Settings
+from hive_cli.data import ClientState, HiveData
+from hive_cli.update import RETRY_DELAY, UpdateChecker
+
+if TYPE_CHECKING:
+    from conftest import FakeBackend
+
+
+class FakeRegistry:
+    def __init__(self, digests: dict[str, str]) -> None:
+        self.digests = digests
+        self.requests: list[str] = []
+        self.error: Exception | None = None
+
+    def manifest_digest(
+        self, reference: str, etag: str | None = None  # noqa: ARG002
+    ) -> tuple[str | None, str | None]:
+        self.requests.append(reference)
+        if self.error is not None:
+            raise self.error
+        return self.digests[reference], None
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(update, "UPDATE_CACHE", tmp_path / "update.json")
+    monkeypatch.setattr(update, "__version__", "1.0.0")
+    monkeypatch.setattr(update, "time", clock)
+    return clock
+
+
+def checker(backend: "FakeBackend", registry: FakeRegistry) -> UpdateChecker:
+    checker = UpdateChecker(HiveData(settings=Settings()), backend)
+    checker.registry = registry  # type: ignore[assignment]
+    return checker
+
+
+def test_check_is_skipped_within_ttl(clock: Clock, backend: "FakeBackend") -> None:
+    registry = FakeRegistry({"1.0.0": "sha256:a", "latest": "sha256:b"})
+    updates = checker(backend, registry)
+    updates.check()
+    assert updates.hive.client_state == ClientState.UPDATE_AVAILABLE
+    clock.now += 60
+    updates.check()
+    assert registry.requests == ["1.0.0", "latest"]
+    clock.now += updates.hive.settings.update_check_ttl
+    updates.check()
+    assert registry.requests == ["1.0.0", "latest", "latest"]
+
+
+def test_failed_checks_back_off(clock: Clock, backend: "FakeBackend") -> None:
+    registry = FakeRegistry({})
+    registry.error = ConnectionError("offline")
+    updates = checker(backend, registry)
+    updates.check()
+    assert updates.cache.next_check == clock.now + RETRY_DELAY
+    clock.now = updates.cache.next_check
+    updates.check()
+    assert updates.cache.failures == 2
+    assert updates.cache.next_check == clock.now + 2 * RETRY_DELAY
+    assert updates.hive.client_state == ClientState.UNKNOWN
+
+
+def test_upgrade_invalidates_cached_result(
+    clock: Clock, backend: "FakeBackend", monkeypatch: pytest.MonkeyPatch
+) -> None:
+    registry = FakeRegistry(
+        {"1.0.0": "sha256:a", "1.1.0": "sha256:b", "latest": "sha256:b"}
+    )
+    checker(backend, registry).check()
+    clock.now += 60
+    monkeypatch.setattr(update, "__version__", "1.1.0")
+    updates = checker(backend, registry)
+    updates.check()
+    assert registry.requests[-2:] == ["1.1.0", "latest"]
+    assert updates.hive.client_state == ClientState.UP_TO_DATE
@@ -0,0 +1,33 @@
+from pathlib import Path
+from queue import Empty, Queue
+
+import pytest
+
+from hive_cli.watcher import RepoWatcher
+
+
+def test_watcher_reports_relative_paths(tmp_path: Path) -> None:
+    (tmp_path / ".git").mkdir()
+    changes: Queue[str | None] = Queue()
+    watcher = RepoWatcher(tmp_path, changes.put)
+    if not watcher.start():
+        pytest.skip("inotify is not available")
+    try:
+        (tmp_path / ".git" / "index").write_text("")
+        (tmp_path / "hive.yml").write_text("compose: []\n")
+        assert changes.get(timeout=2) == "hive.yml"
+        (tmp_path / "web").mkdir()
+        while changes.get(timeout=2) != "web":
+            pass
+        # new directories are watched as well
+        (tmp_path / "web" / "compose.yml").write_text("services: {}\n")
+        assert changes.get(timeout=2) == "web/compose.yml"
+        seen = set()
+        while True:
+            try:
+                seen.add(changes.get(timeout=0.2))
+            except Empty:
+                break
+        assert not any(path and path.startswith(".git") for path in seen)
+    finally:
+        watcher.stop()